@@ -1,6 +1,29 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
+from .models import ArchivedUser, CsvJob, CustomUser
+
+
+class DeletedFilter(admin.SimpleListFilter):
+    """削除状態の絞り込み(指定しなければ削除済みを表示しない)"""
+
+    title = "削除状態"
+    parameter_name = "deleted"
+
+    def lookups(self, request, model_admin):
+        return (("yes", "削除済み"), ("all", "すべて"))
+
+    def choices(self, changelist):
+        # 指定なしは「すべて」ではなく削除されていないユーザーなので、Django の「All」を書き換える
+        choices = super().choices(changelist)
+        yield {**next(choices), "display": "削除されていない"}
+        yield from choices
+
+    def queryset(self, request, queryset):
+        if self.value() == "yes":
+            return queryset.filter(is_deleted=True)
+        if self.value() == "all":
+            return queryset
+        return queryset.filter(is_deleted=False)
 
 
 @admin.register(CustomUser)
@@ -39,6 +62,7 @@ class CustomUserAdmin(UserAdmin):
             },
         ),
     )
+    list_filter = (DeletedFilter,) + UserAdmin.list_filter
     ordering = ("username",)
 
     # 論理削除にする
@@ -46,5 +70,24 @@ class CustomUserAdmin(UserAdmin):
         obj.delete()  # CustomUser.delete() が呼ばれるので論理削除になる
 
     def delete_queryset(self, request, queryset):
-        for obj in queryset:
-            obj.delete()
+        queryset.soft_delete()  # 1回の UPDATE でまとめて論理削除
+
+
+@admin.register(CsvJob)
+class CsvJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "kind",
+        "status",
+        "processed",
+        "success_count",
+        "error_count",
+        "created_at",
+    )
+    list_filter = ("kind", "status")
+
+
+@admin.register(ArchivedUser)
+class ArchivedUserAdmin(admin.ModelAdmin):
+    list_display = ("original_id", "username", "email", "deleted_at", "archived_at")
+    search_fields = ("username", "email")
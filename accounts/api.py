@@ -0,0 +1,147 @@
+"""
+ユーザー一覧の JSON / NDJSON API
+- 検索条件は一覧・CSVエクスポートと同じ(filter_params / filter_users)
+- fields=id,username のように列を選ぶと、その列だけを values() で読み込む
+- JSON はカーソルページネーション(一覧と同じ KeysetPaginator)
+- NDJSON は全件を1行1ユーザーでストリーミングする
+  (ページ単位で読み込むので件数が多くてもメモリは一定。cursor から再開できる)
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from .conditional import list_etag
+from .filters import filter_params, filter_users
+from .models import CustomUser
+from .pagination import InvalidCursor, KeysetPaginator
+from .routers import read_db
+
+# fields= で選べる列
+API_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "birthday",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+# fields= を省略したときの列(CSVエクスポートと同じ)
+DEFAULT_FIELDS = ("id", "username", "email", "birthday", "created_at", "updated_at")
+
+
+class InvalidFields(ValueError):
+    """fields= に選べない列がある場合の例外"""
+
+
+def parse_fields(value):
+    """fields= の値を列名のタプルにする(空なら DEFAULT_FIELDS)"""
+    names = (f.strip() for f in (value or "").split(","))
+    fields = tuple(dict.fromkeys(f for f in names if f))
+    if not fields:
+        return DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown:
+        raise InvalidFields(", ".join(unknown))
+    return fields
+
+
+def page_size(value, default, maximum):
+    """limit= の値(不正なら default、maximum を超えない)"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(size, 1), maximum)
+
+
+def _paginator(request, fields, per_page):
+    params = filter_params(request.GET)
+    users = filter_users(params, CustomUser.objects.using(read_db()))
+    # カーソルを作るのに並び順の列が必要なので、選ばれていなくても読み込む
+    columns = dict.fromkeys(fields + KeysetPaginator.fields)
+    return KeysetPaginator(users.values(*columns), per_page)
+
+
+def _select(row, fields):
+    return {f: row[f] for f in fields}
+
+
+def _error(message):
+    return JsonResponse({"error": message}, status=400)
+
+
+# ユーザー一覧(JSON)
+@require_GET
+@condition(etag_func=list_etag)
+def user_list(request):
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+    except InvalidFields as e:
+        return _error(f"unknown fields: {e}")
+
+    per_page = page_size(
+        request.GET.get("limit"),
+        getattr(settings, "USER_API_PAGE_SIZE", 100),
+        getattr(settings, "USER_API_MAX_PAGE_SIZE", 1000),
+    )
+    try:
+        page = _paginator(request, fields, per_page).page(request.GET.get("cursor"))
+    except InvalidCursor:
+        return _error("invalid cursor")
+
+    return JsonResponse(
+        {
+            "results": [_select(row, fields) for row in page],
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def stream_ndjson(paginator, fields, cursor=None):
+    """
+    先頭(または cursor の次)から最後まで、1ページずつ読み込んで NDJSON を返すジェネレータ
+    - 1ページ分をまとめて yield する
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    while True:
+        page = paginator.page(cursor)
+        if page.object_list:
+            yield "".join(encoder.encode(_select(row, fields)) + "\n" for row in page)
+        if not page.has_next:
+            return
+        cursor = page.next_cursor
+
+
+# ユーザー一覧(NDJSON、全件をストリーミング)
+@require_GET
+@condition(etag_func=list_etag)
+def user_list_ndjson(request):
+    try:
+        fields = parse_fields(request.GET.get("fields"))
+    except InvalidFields as e:
+        return _error(f"unknown fields: {e}")
+
+    # ページはレスポンスを返した後に読むので、読み込み先のDBをここで決めておく
+    paginator = _paginator(
+        request, fields, getattr(settings, "USER_API_STREAM_CHUNK_SIZE", 2000)
+    )
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            direction, _ = paginator.decode_cursor(cursor)
+        except InvalidCursor:
+            return _error("invalid cursor")
+        if direction != "n":
+            return _error("invalid cursor")
+
+    return StreamingHttpResponse(
+        stream_ndjson(paginator, fields, cursor),
+        content_type="application/x-ndjson",
+    )
@@ -0,0 +1,212 @@
+"""
+論理削除から一定期間たったユーザーをアーカイブし、メインテーブルから消す
+- アーカイブ先は ArchivedUser テーブル、または gzip 圧縮した JSONL / CSV ファイル
+- 削除日時は論理削除したときの updated_at を使う
+- batch_size 件ずつ pk 順に処理し、バッチごとにコミットする
+- ファイルに書く場合は、書き込んだがまだ消していないバッチをチェックポイントに残し、
+  途中で止まっても次回の実行で二重に書かずに再開できる
+"""
+
+import csv
+import datetime
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedUser
+
+# アーカイブする列(パスワードハッシュは残さない)
+ARCHIVE_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "birthday",
+    "is_staff",
+    "is_superuser",
+    "date_joined",
+    "last_login",
+    "created_at",
+    "updated_at",
+)
+
+
+def cutoff_for(days, now=None):
+    """days 日より前に削除されたユーザーを対象にする境界日時"""
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def candidates(cutoff):
+    """アーカイブ対象(cutoff より前に論理削除されたユーザー)"""
+    User = get_user_model()
+    return User.all_with_deleted.filter(is_deleted=True, updated_at__lt=cutoff)
+
+
+def _jsonable(row):
+    return {
+        k: v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v
+        for k, v in row.items()
+    }
+
+
+class ArchiveStats:
+    """処理件数と経過時間"""
+
+    def __init__(self):
+        self.batches = 0
+        self.archived = 0
+        self.resumed = 0  # 前回書き込み済みで、今回は削除だけした件数
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        seconds = self.seconds
+        return self.archived / seconds if seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.archived} users in {self.batches} batches, "
+            f"{self.seconds:.2f}s ({self.rate:,.0f} users/s)"
+        )
+
+
+class TableArchive:
+    """
+    ArchivedUser テーブルに移す
+    - 書き込みと削除が同じトランザクションなので、チェックポイントは不要
+    """
+
+    def pending(self):
+        return []
+
+    def write(self, rows):
+        ArchivedUser.objects.bulk_create(
+            [
+                ArchivedUser(
+                    original_id=row["id"],
+                    username=row["username"],
+                    email=row["email"],
+                    deleted_at=row["updated_at"],
+                    data=_jsonable(row),
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+    def mark_pending(self, pks):
+        pass
+
+    def clear_pending(self):
+        pass
+
+
+class FileArchive:
+    """
+    gzip 圧縮した JSONL / CSV ファイルに追記する(拡張子 .jsonl.gz / .csv.gz で判定)
+    - バッチごとに gzip のメンバーを追記するので、途中で止まっても前のバッチは読める
+    - <path>.checkpoint に書き込み済み・未削除の pk を残す
+    """
+
+    def __init__(self, path):
+        if path.endswith(".jsonl.gz"):
+            self.format = "jsonl"
+        elif path.endswith(".csv.gz"):
+            self.format = "csv"
+        else:
+            raise ValueError("アーカイブファイルは .jsonl.gz か .csv.gz にしてください。")
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+
+    def pending(self):
+        """前回、ファイルに書いたが削除をコミットできなかった pk"""
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)["pending"]
+        except FileNotFoundError:
+            return []
+
+    def write(self, rows):
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "ab") as raw:
+            with gzip.open(raw, "wt", encoding="utf-8", newline="") as f:
+                if self.format == "jsonl":
+                    for row in rows:
+                        f.write(json.dumps(_jsonable(row), ensure_ascii=False) + "\n")
+                else:
+                    writer = csv.writer(f)
+                    if is_new:
+                        writer.writerow(ARCHIVE_FIELDS)
+                    writer.writerows(
+                        [row[field] for field in ARCHIVE_FIELDS] for row in rows
+                    )
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    def mark_pending(self, pks):
+        # 一時ファイルに書いてから置き換え、壊れたチェックポイントを残さない
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pending": pks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def clear_pending(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+
+def _delete(pks):
+    # QuerySet.delete() は物理削除(CustomUser.delete() の論理削除は通らない)
+    User = get_user_model()
+    User.all_with_deleted.filter(pk__in=pks, is_deleted=True).delete()
+
+
+def archive_users(cutoff, target, batch_size=1000, progress=None):
+    """
+    cutoff より前に論理削除されたユーザーを target に移して物理削除する
+    - progress(stats) を渡すとバッチごとに呼ばれる
+    """
+    stats = ArchiveStats()
+
+    # 前回の途中で止まったバッチは、書き込み済みなので削除だけ行う
+    pending = target.pending()
+    if pending:
+        with transaction.atomic():
+            _delete(pending)
+        target.clear_pending()
+        stats.resumed = len(pending)
+
+    queryset = candidates(cutoff).order_by("pk").values(*ARCHIVE_FIELDS)
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not rows:
+                break
+            pks = [row["id"] for row in rows]
+            target.write(rows)
+            target.mark_pending(pks)
+            _delete(pks)
+        target.clear_pending()
+
+        last_pk = pks[-1]
+        stats.batches += 1
+        stats.archived += len(rows)
+        if progress:
+            progress(stats)
+    return stats
@@ -0,0 +1,98 @@
+"""
+一覧・詳細・CSVエクスポートの非同期(ASGI)版
+- uvicorn などの ASGI サーバーで、スレッドに逃がさず非同期ORMで処理する
+- 表示内容・キャッシュ・条件付きGETは同期版(views.py)と同じ
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+
+from . import detail_cache, search
+from .conditional import (
+    acondition,
+    adetail_state,
+    adetail_updated_at,
+    alist_state,
+    list_read_db,
+)
+from .counts import acount_users
+from .exporter import aexport_rows, astream_users_csv
+from .filters import filter_params, filter_users
+from .models import CustomUser
+from .pagination import InvalidCursor, KeysetPaginator
+from .views import user_list_context
+
+
+def session_loaded(view):
+    """
+    セッションを先に非同期で読み込んでおく
+    (メッセージやテンプレートが同期でセッションを読むため)
+    """
+
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        await request.session.aitems()
+        return await view(request, *args, **kwargs)
+
+    return inner
+
+
+# ユーザー一覧ビュー(非同期版)
+@session_loaded
+@acondition(alist_state)
+async def user_list(request):
+    db = list_read_db(request)
+    await search.ais_available(db)
+    params = filter_params(request.GET)
+    users = filter_users(params, CustomUser.objects.using(db))
+
+    paginator = KeysetPaginator(users, getattr(settings, "USER_LIST_PAGE_SIZE", 50))
+    try:
+        page = await paginator.apage(request.GET.get("cursor"))
+    except InvalidCursor:
+        page = await paginator.apage()
+
+    total_count = await acount_users(params, users)
+    context = user_list_context(request, params, page, total_count)
+    return render(request, "accounts/user_list.html", context)
+
+
+# ユーザー詳細(非同期版)
+@session_loaded
+@acondition(adetail_state)
+async def user_detail(request, pk):
+    # 表示するメッセージがあるときはキャッシュを使わない
+    use_cache = len(messages.get_messages(request)) == 0
+    if use_cache:
+        updated_at = await adetail_updated_at(request, pk)
+        content = updated_at and await detail_cache.aget(pk, updated_at)
+        if content is not None:
+            return HttpResponse(content)
+
+    try:
+        user = await CustomUser.all_with_deleted.aget(pk=pk)
+    except CustomUser.DoesNotExist:
+        raise Http404("ユーザーが見つかりません。")
+    response = render(request, "accounts/user_detail.html", {"user": user})
+    if use_cache:
+        await detail_cache.astore(user, response.content)
+    return response
+
+
+# CSVダウンロード機能(非同期版、非同期ジェネレータでストリーミング)
+@session_loaded
+@acondition(alist_state)
+async def export_users_csv(request):
+    db = list_read_db(request)
+    await search.ais_available(db)
+    params = filter_params(request.GET)
+    rows = aexport_rows(filter_users(params, CustomUser.objects.using(db)))
+    response = StreamingHttpResponse(
+        astream_users_csv(rows), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="users.csv"'
+    return response
@@ -0,0 +1,202 @@
+"""
+CSVアップロードによるユーザーの一括編集
+- ID 列と、変更する列(メールアドレス・誕生日・削除フラグ)を持つ CSV を受け付ける
+  見出しはCSVエクスポートと同じなので、エクスポートしたファイルを編集してそのまま戻せる
+  (ユーザー名・作成日時などそれ以外の列は無視する。フィールド名の見出しも使える)
+- 入力チェックは CustomUserEditForm と同じ(BulkEditRowForm)。
+  ユーザーの読み込みとメールアドレスの一意チェックはバッチごとに1クエリずつ
+- batch_size 行ごとに1トランザクションで、変更のあった行だけを bulk_update する
+- 行ごとの結果(更新・変更なし・エラー)を BulkEditResult で返す
+"""
+
+import csv
+
+from django.db import IntegrityError, transaction
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms import BulkEditRowForm
+from .importer import InvalidHeader
+from .models import CustomUser, users_bulk_updated
+
+# 見出し → 変更できるフィールド
+EDIT_COLUMNS = {
+    "メールアドレス": "email",
+    "誕生日": "birthday",
+    "削除フラグ": "is_deleted",
+    "email": "email",
+    "birthday": "birthday",
+    "is_deleted": "is_deleted",
+}
+ID_COLUMNS = ("ID", "id")
+
+# 削除フラグとして受け付ける値(小文字にして比べる)
+FLAG_VALUES = {
+    "1": True,
+    "true": True,
+    "はい": True,
+    "済": True,
+    "0": False,
+    "false": False,
+    "いいえ": False,
+    "": False,
+}
+
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"
+STATUS_ERROR = "error"
+
+
+class BulkEditResult:
+    """一括編集の行ごとの結果"""
+
+    def __init__(self):
+        self.rows = []  # (行番号, ユーザーID, 状態, 内容)
+
+    def add(self, line, pk, status, message=""):
+        self.rows.append((line, pk, status, message))
+
+    def count(self, status):
+        return sum(1 for row in self.rows if row[2] == status)
+
+    def summary(self):
+        return {
+            "updated": self.count(STATUS_UPDATED),
+            "unchanged": self.count(STATUS_UNCHANGED),
+            "errors": self.count(STATUS_ERROR),
+            "rows": [
+                {"line": line, "id": pk, "status": status, "message": message}
+                for line, pk, status, message in sorted(self.rows)
+            ],
+        }
+
+
+def parse_header(headers):
+    """見出しから (ID の列番号, {列番号: フィールド名}) を返す"""
+    headers = [h.strip() for h in headers or []]
+    id_index = next((i for i, h in enumerate(headers) if h in ID_COLUMNS), None)
+    columns = {i: EDIT_COLUMNS[h] for i, h in enumerate(headers) if h in EDIT_COLUMNS}
+    if id_index is None or not columns:
+        raise InvalidHeader(headers)
+    return id_index, columns
+
+
+def bulk_edit(text_file, batch_size=500):
+    """CSV の各行の変更をユーザーに反映し、BulkEditResult を返す"""
+    reader = csv.reader(text_file)
+    id_index, columns = parse_header(next(reader, None))
+
+    result = BulkEditResult()
+    seen_emails = set()  # ファイル内での重複チェック用
+    batch = []
+    for line, row in enumerate(reader, start=2):  # 2行目からデータ開始
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            _edit_batch(batch, id_index, columns, result, seen_emails)
+            batch = []
+    if batch:
+        _edit_batch(batch, id_index, columns, result, seen_emails)
+    return result
+
+
+def _format_errors(form):
+    messages = []
+    for name, errors in form.errors.items():
+        label = form.fields[name].label if name in form.fields else ""
+        messages += [f"{label}: {e}" if label else e for e in errors]
+    return " ".join(messages)
+
+
+def _edit_batch(batch, id_index, columns, result, seen_emails):
+    # ID の形式チェック
+    rows = []
+    for line, row in batch:
+        value = row[id_index].strip() if id_index < len(row) else ""
+        try:
+            rows.append((line, int(value), row))
+        except ValueError:
+            result.add(line, value, STATUS_ERROR, "ID が不正です。")
+
+    with transaction.atomic():
+        users = CustomUser.all_with_deleted.in_bulk([pk for _, pk, _ in rows])
+
+        # 入力チェック(CustomUserEditForm と同じルール、DBへの問い合わせなし)
+        candidates = []
+        for line, pk, row in rows:
+            user = users.get(pk)
+            if user is None:
+                result.add(line, pk, STATUS_ERROR, "ユーザーが見つかりません。")
+                continue
+            # CSV にない列は今の値のまま
+            data = model_to_dict(user, BulkEditRowForm._meta.fields)
+            for index, field in columns.items():
+                data[field] = row[index].strip() if index < len(row) else ""
+            # チェックボックスの解釈だと "0" も True になるので、削除フラグは自分で読む
+            if "is_deleted" in columns.values():
+                flag = FLAG_VALUES.get(data["is_deleted"].lower())
+                if flag is None:
+                    result.add(line, pk, STATUS_ERROR, "削除フラグが不正です。")
+                    continue
+                data["is_deleted"] = flag
+            form = BulkEditRowForm(data, instance=user)
+            if not form.is_valid():
+                result.add(line, pk, STATUS_ERROR, _format_errors(form))
+                continue
+            if not form.changed_data:
+                result.add(line, pk, STATUS_UNCHANGED)
+                continue
+            candidates.append((line, form.instance, form.changed_data))
+
+        # メールアドレスの一意チェック(削除済みも含めて1クエリ)
+        # 同じファイルでほかのユーザーが手放すアドレスも使えない(入れ替えは2回に分ける)
+        emails = {user.email for _, user, changed in candidates if "email" in changed}
+        taken = set(
+            CustomUser.all_with_deleted.filter(email__in=emails).values_list(
+                "email", flat=True
+            )
+        )
+
+        now = timezone.now()
+        targets = []
+        update_fields = {"updated_at"}
+        for line, user, changed in candidates:
+            if "email" in changed:
+                if user.email in taken or user.email in seen_emails:
+                    result.add(
+                        line,
+                        user.pk,
+                        STATUS_ERROR,
+                        "メールアドレスは既に登録されています。",
+                    )
+                    continue
+                seen_emails.add(user.email)
+            if "is_deleted" in changed:
+                # 論理削除(Model.delete)と同じくログインも止める。戻したら有効にする
+                user.is_active = not user.is_deleted
+                changed = changed + ["is_active"]
+            # bulk_update では auto_now が効かないので自分で入れる
+            user.updated_at = now
+            update_fields.update(changed)
+            targets.append((line, user))
+
+        if targets:
+            try:
+                with transaction.atomic():
+                    CustomUser.all_with_deleted.bulk_update(
+                        [user for _, user in targets], sorted(update_fields)
+                    )
+            except IntegrityError:
+                # チェックの後にほかのリクエストが同じアドレスを登録した場合など
+                for line, user in targets:
+                    result.add(
+                        line,
+                        user.pk,
+                        STATUS_ERROR,
+                        "一意制約に違反したため、このバッチは更新しませんでした。",
+                    )
+                return
+            for line, user in targets:
+                result.add(line, user.pk, STATUS_UPDATED)
+
+    if targets:
+        users_bulk_updated.send(sender=CustomUser, pks=[user.pk for _, user in targets])
@@ -0,0 +1,177 @@
+"""
+条件付きGET(ETag / Last-Modified)用の関数
+- django.views.decorators.http.condition に渡して使う
+- 変更がなければビューを実行せず 304 Not Modified を返す
+- 表示待ちのメッセージがあるときは None を返して通常どおり表示する
+- 一覧・エクスポート・API は ETag だけを使う(Last-Modified では変更を検出しきれない)
+- 非同期ビューには acondition と a で始まる関数を使う
+"""
+
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import search
+from .counts import acount_users, count_users
+from .filters import filter_params, filter_users
+from .models import CustomUser
+from .routers import read_db
+
+
+def _has_messages(request):
+    return len(messages.get_messages(request)) > 0
+
+
+def _etag(*parts):
+    return hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+# ユーザー詳細: その行の更新日時(主キーで1行読む。詳細ビューのキャッシュのキーにも使う)
+def detail_updated_at(request, pk):
+    if not hasattr(request, "_user_updated_at"):
+        request._user_updated_at = (
+            CustomUser.all_with_deleted.filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+    return request._user_updated_at
+
+
+async def adetail_updated_at(request, pk):
+    """detail_updated_at() の非同期版"""
+    if not hasattr(request, "_user_updated_at"):
+        request._user_updated_at = await (
+            CustomUser.all_with_deleted.filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .afirst()
+        )
+    return request._user_updated_at
+
+
+def detail_last_modified(request, pk):
+    if _has_messages(request):
+        return None
+    return detail_updated_at(request, pk)
+
+
+def detail_etag(request, pk):
+    if _has_messages(request):
+        return None
+    updated_at = detail_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return _etag(pk, updated_at.isoformat())
+
+
+# 一覧・エクスポート: 検索条件に一致する行(論理削除済みも含む)の最終更新日時と件数
+# - 論理削除も updated_at を進めるので、削除済みを含めた最大値を使う
+# - 件数も含めるので物理削除(アーカイブ)されたときも変わる
+# - Last-Modified は付けない(秒単位なので同じ秒の更新を区別できず、物理削除でも進まない)
+def _filter_state(request):
+    if not hasattr(request, "_user_filter_state"):
+        params = filter_params(request.GET)
+        users = filter_users(params)
+        with_deleted = filter_users(params, CustomUser.all_with_deleted.all())
+        last_modified = with_deleted.aggregate(last=Max("updated_at"))["last"]
+        request._user_filter_state = (last_modified, count_users(params, users))
+    return request._user_filter_state
+
+
+# バックグラウンドのジョブと差分エクスポート(結果が時刻で変わる)は対象外
+def _skip_list(request):
+    return (
+        _has_messages(request)
+        or request.GET.get("background")
+        or "since" in request.GET
+    )
+
+
+def list_etag(request):
+    if _skip_list(request):
+        return None
+    last_modified, count = _filter_state(request)
+    return _etag(
+        request.path,
+        request.GET.urlencode(),
+        # エクスポートは Accept で形式が変わる
+        request.headers.get("Accept", ""),
+        last_modified.isoformat() if last_modified else "",
+        count,
+        request.session.get("import_job", ""),
+    )
+
+
+# ---- 非同期ビュー用 ----
+# (Django の condition は ETag 関数を同期で呼ぶので、非同期ORMを使う版を用意する)
+
+
+def acondition(state_func):
+    """
+    state_func(request, ...) が返す (ETag, 最終更新日時) で条件付きGETを処理する
+    - どちらも None なら通常どおりビューを実行する
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = await state_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if timestamp and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(timestamp)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            return response
+
+        return inner
+
+    return decorator
+
+
+async def adetail_state(request, pk):
+    if _has_messages(request):
+        return None, None
+    updated_at = await adetail_updated_at(request, pk)
+    if updated_at is None:
+        return None, None
+    return _etag(pk, updated_at.isoformat()), updated_at
+
+
+def list_read_db(request):
+    """非同期版の一覧・エクスポートで読むDB(条件付きGETとビューで同じものを使う)"""
+    if not hasattr(request, "_user_read_db"):
+        request._user_read_db = read_db()
+    return request._user_read_db
+
+
+async def alist_state(request):
+    if _skip_list(request):
+        return None, None
+    db = list_read_db(request)
+    await search.ais_available(db)
+    params = filter_params(request.GET)
+    users = filter_users(params, CustomUser.objects.using(db))
+    with_deleted = filter_users(params, CustomUser.all_with_deleted.using(db))
+    last_modified = (await with_deleted.aaggregate(last=Max("updated_at")))["last"]
+    count = await acount_users(params, users)
+    etag = _etag(
+        request.path,
+        request.GET.urlencode(),
+        # エクスポートは Accept で形式が変わる
+        request.headers.get("Accept", ""),
+        last_modified.isoformat() if last_modified else "",
+        count,
+        request.session.get("import_job", ""),
+    )
+    # 同期版と同じく Last-Modified は付けない
+    return etag, None
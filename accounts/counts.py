@@ -0,0 +1,109 @@
+"""
+ユーザー一覧の件数表示
+- 検索条件なし: UserCounter(トリガーで維持している件数)を読むだけ
+- 検索条件あり: 条件ごとに COUNT の結果をキャッシュする
+  CustomUser が保存されたらバージョンを上げて、古いキャッシュをまとめて無効にする
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+
+from .models import UserCounter
+
+VERSION_KEY = "accounts:user_count:version"
+
+
+def _timeout():
+    return getattr(settings, "USER_COUNT_CACHE_TIMEOUT", 300)
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.set(VERSION_KEY, version, None)
+    return version
+
+
+async def _aversion():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        version = 1
+        await cache.aset(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate():
+    """件数キャッシュをすべて無効にする"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def _key(params, version):
+    # 空の条件を除いて並べ替えた検索条件からキーを作る
+    normalized = urlencode(sorted((k, v) for k, v in params.items() if v))
+    digest = hashlib.md5(normalized.encode("utf-8")).hexdigest()
+    return f"accounts:user_count:{version}:{digest}"
+
+
+def cache_key(params):
+    return _key(params, _version())
+
+
+def total_count(using="default"):
+    """削除済みを除いた全件数(トリガーで維持している件数を読むだけ)"""
+    if connections[using].vendor != "sqlite":
+        # トリガーがないDBではキャッシュした COUNT(*) を使う
+        return cache.get_or_set(
+            cache_key({}), lambda: _count_all(using), _timeout()
+        )
+    counter = UserCounter.objects.using(using).filter(pk=1).first()
+    if counter is None:
+        # テーブルが空にされた場合などは数え直して作り直す
+        users = get_user_model().all_with_deleted.using(using)
+        counter, _ = UserCounter.objects.using(using).get_or_create(
+            pk=1,
+            defaults={
+                "total": users.count(),
+                "deleted": users.filter(is_deleted=True).count(),
+            },
+        )
+    return counter.total - counter.deleted
+
+
+def _count_all(using):
+    return get_user_model().objects.using(using).count()
+
+
+def count_users(params, queryset):
+    """検索条件に一致する件数"""
+    if not any(params.values()):
+        return total_count(queryset.db)
+    return cache.get_or_set(cache_key(params), queryset.count, _timeout())
+
+
+async def acount_users(params, queryset):
+    """count_users() の非同期版"""
+    if not any(params.values()):
+        if connections[queryset.db].vendor != "sqlite":
+            return await sync_to_async(total_count)(queryset.db)
+        counters = UserCounter.objects.using(queryset.db)
+        counter = await counters.filter(pk=1).afirst()
+        if counter is None:
+            return await sync_to_async(total_count)(queryset.db)
+        return counter.total - counter.deleted
+
+    key = _key(params, await _aversion())
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, _timeout())
+    return count
@@ -0,0 +1,81 @@
+"""
+ユーザー詳細ページのレスポンスキャッシュ
+- キーは pk と更新日時、値はレンダリング済みの HTML
+- 更新日時は毎回DBから(主キーで1行)読むので、保存・論理削除で updated_at が進めば
+  ほかのプロセスのキャッシュも使われなくなる(古いエントリはタイムアウトで消える)
+- 使うキャッシュは設定 USER_DETAIL_CACHE(CACHES のエイリアス)で切り替える
+- ヒット・ミスの回数を数えて cache_stats ビューから取得できる
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+HITS_KEY = "accounts:user_detail:hits"
+MISSES_KEY = "accounts:user_detail:misses"
+
+
+def get_cache():
+    return caches[getattr(settings, "USER_DETAIL_CACHE", "default")]
+
+
+def _key(pk, updated_at):
+    return f"accounts:user_detail:{pk}:{updated_at.isoformat()}"
+
+
+def _incr(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def _aincr(key):
+    cache = get_cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def get(pk, updated_at):
+    """updated_at の時点の HTML がキャッシュ済みなら返す"""
+    content = get_cache().get(_key(pk, updated_at))
+    _incr(HITS_KEY if content is not None else MISSES_KEY)
+    return content
+
+
+async def aget(pk, updated_at):
+    """get() の非同期版"""
+    content = await get_cache().aget(_key(pk, updated_at))
+    await _aincr(HITS_KEY if content is not None else MISSES_KEY)
+    return content
+
+
+def store(user, content):
+    get_cache().set(
+        _key(user.pk, user.updated_at),
+        content,
+        getattr(settings, "USER_DETAIL_CACHE_TIMEOUT", 600),
+    )
+
+
+async def astore(user, content):
+    """store() の非同期版"""
+    await get_cache().aset(
+        _key(user.pk, user.updated_at),
+        content,
+        getattr(settings, "USER_DETAIL_CACHE_TIMEOUT", 600),
+    )
+
+
+def stats():
+    """ヒット・ミスの回数"""
+    cache = get_cache()
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        "hits": values.get(HITS_KEY, 0),
+        "misses": values.get(MISSES_KEY, 0),
+    }
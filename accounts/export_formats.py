@@ -0,0 +1,151 @@
+"""
+CSVエクスポートの出力形式
+- csv: これまでどおりの BOM 付き CSV
+- csv.gz: CSV を gzip で圧縮しながらストリーミングする
+- parquet / arrow: 列指向の形式(pyarrow がインストールされている場合だけ)
+  Arrow は IPC ストリーム形式。どちらも列名はフィールド名(id, username, ...)
+- 形式は ?format= か、なければ Accept ヘッダーで選ぶ(どちらもなければ csv)
+"""
+
+import zlib
+
+from django.conf import settings
+
+from .exporter import stream_users_csv
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pip install pyarrow で有効になる
+    pyarrow = None
+
+# 形式 → (Content-Type, ファイルの拡張子)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+class UnsupportedFormat(ValueError):
+    """選べない形式(未知の形式、pyarrow がない場合の列指向形式)"""
+
+
+def available_formats():
+    if pyarrow is None:
+        return [f for f in FORMATS if f not in COLUMNAR_FORMATS]
+    return list(FORMATS)
+
+
+def select_format(request):
+    """?format= または Accept ヘッダーから形式を決める"""
+    formats = available_formats()
+    name = request.GET.get("format")
+    if name:
+        if name not in formats:
+            raise UnsupportedFormat(name)
+        return name
+    content_types = {FORMATS[f][0]: f for f in formats}
+    preferred = request.get_preferred_type(list(content_types))
+    return content_types.get(preferred, "csv")
+
+
+def _gzip_level():
+    return getattr(settings, "CSV_EXPORT_GZIP_LEVEL", 6)
+
+
+def gzip_stream(chunks, level=None):
+    """文字列のチャンクを gzip で圧縮しながら返すジェネレータ(全体をメモリに載せない)"""
+    compressor = zlib.compressobj(
+        _gzip_level() if level is None else level, zlib.DEFLATED, 31
+    )
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _arrow_type(field):
+    types = {
+        "id": pyarrow.int64(),
+        "birthday": pyarrow.date32(),
+        "created_at": pyarrow.timestamp("us", tz="UTC"),
+        "updated_at": pyarrow.timestamp("us", tz="UTC"),
+        "is_deleted": pyarrow.bool_(),
+    }
+    return types.get(field, pyarrow.string())
+
+
+def columnar_batch_size():
+    """Parquet の行グループ・Arrow のレコードバッチ1つあたりの行数"""
+    return getattr(settings, "CSV_EXPORT_COLUMNAR_BATCH_SIZE", 65536)
+
+
+class _Sink:
+    """pyarrow の書き込み先。書かれたバイト列を take() で取り出す"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_columnar(rows, fields, name, size=None):
+    """行のタプルを size 行ずつ列に組み替え、Parquet / Arrow のバイト列を返すジェネレータ"""
+    if pyarrow is None:
+        raise UnsupportedFormat(name)
+    size = size or columnar_batch_size()
+    schema = pyarrow.schema([(f, _arrow_type(f)) for f in fields])
+    sink = _Sink()
+    if name == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    def write(batch):
+        columns = zip(*batch)
+        arrays = [
+            pyarrow.array(column, type=field.type)
+            for column, field in zip(columns, schema)
+        ]
+        writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            write(batch)
+            batch = []
+            yield sink.take()
+    if batch:
+        write(batch)
+    writer.close()
+    yield sink.take()
+
+
+def stream_export(rows, name, fields, header):
+    """形式に合わせたレスポンスの中身(文字列・バイト列のイテレータ)を返す"""
+    if name == "csv":
+        return stream_users_csv(rows, header=header)
+    if name == "csv.gz":
+        return gzip_stream(stream_users_csv(rows, header=header))
+    return stream_columnar(rows, fields, name)
@@ -0,0 +1,69 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .search import filter_email, filter_username
+
+# 検索条件として受け付けるパラメータ
+FILTER_PARAMS = (
+    "username",
+    "email",
+    "created_from",
+    "created_to",
+    "updated_from",
+    "updated_to",
+)
+
+
+def filter_params(query):
+    """GET パラメータ(QueryDict など)から検索条件だけを取り出す"""
+    return {key: query.get(key, "").strip() for key in FILTER_PARAMS}
+
+
+def _parse_date(value):
+    """日付文字列をその日の0時(現在のタイムゾーン)にする。不正な値は None"""
+    try:
+        date = parse_date(value or "")
+    except ValueError:
+        return None
+    if date is None:
+        return None
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def filter_users(params, queryset=None):
+    """
+    一覧・CSVエクスポート共通の検索処理
+    - 削除済みのユーザーは含めない
+    - 空の条件は無視する(空白だと全件)
+    - 並び順は更新日時、作成日時の降順
+    """
+    if queryset is None:
+        queryset = get_user_model().objects.all()
+
+    if params.get("username"):  # 大文字と小文字の区別を行う
+        queryset = filter_username(queryset, params["username"])
+    if params.get("email"):  # メールアドレスは大文字と小文字の区別を行わない
+        queryset = filter_email(queryset, params["email"])
+
+    # 日付で絞り込み
+    date_filters = (
+        ("created_from", "created_at__gte"),
+        ("created_to", "created_at__lte"),
+        ("updated_from", "updated_at__gte"),
+        ("updated_to", "updated_at__lte"),
+    )
+    for param, lookup in date_filters:
+        value = _parse_date(params.get(param))
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+
+    # 更新日時は作成日時より前にならないので、作成日時の下限は更新日時の下限にもなる
+    # (並び順のインデックスを範囲で読めるので、フルスキャン・並べ替えにならない)
+    created_from = _parse_date(params.get("created_from"))
+    if created_from:
+        queryset = queryset.filter(updated_at__gte=created_from)
+
+    return queryset.order_by("-updated_at", "-created_at")
@@ -3,6 +3,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import CustomUser
+from .passwords import hash_password
 from django.core.exceptions import ValidationError
 import datetime
 
@@ -55,6 +56,15 @@ class CustomUserCreationForm(UserCreationForm):
             }
         )
 
+    # パスワードのハッシュ化は同時実行数を制限したスレッドプールで行う
+    def set_password_and_save(
+        self, user, password_field_name="password1", commit=True
+    ):
+        user.password = hash_password(self.cleaned_data[password_field_name])
+        if commit:
+            user.save()
+        return user
+
     # パスワード独自バリデーション
     def clean_password1(self):
         password = self.cleaned_data.get("password1")
@@ -101,8 +111,55 @@ class CustomUserUpdateForm(forms.ModelForm):
 
 
 class CustomUserEditForm(forms.ModelForm):
-    """ユーザー編集用フォーム"""
+    """
+    ユーザー編集用フォーム
+    - 編集画面を開いた時の更新日時(version)を隠しフィールドで持ち、
+      保存時にほかの人が先に更新していたらエラーにする(上書きしない)
+    """
+
+    conflict_message = (
+        "ほかのユーザーが先にこのユーザーを更新しました。"
+        "画面を開き直して最新の内容を確認してください。"
+    )
+
+    # マイクロ秒まで比較するので、初期値は isoformat の文字列で渡す
+    version = forms.DateTimeField(widget=forms.HiddenInput)
 
     class Meta:
         model = CustomUser
         fields = ("username", "email", "birthday")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "version" in self.fields and self.instance.pk is not None:
+            self.fields["version"].initial = self.instance.updated_at.isoformat()
+
+    def save_if_unchanged(self):
+        """
+        変更した列だけを、version から更新されていない場合に保存する
+        - 保存できたら True。競合したらフォームにエラーを付けて False
+        """
+        fields = [f for f in self.changed_data if f in self._meta.fields]
+        if not fields:
+            return True
+        if self.instance.save_if_unchanged(self.cleaned_data["version"], fields):
+            return True
+        self.add_error(None, self.conflict_message)
+        return False
+
+
+class BulkEditRowForm(CustomUserEditForm):
+    """
+    一括編集(bulk_edit)の1行分
+    - 入力チェックは CustomUserEditForm と同じ
+    - 一意チェックは行ごとに問い合わせず、bulk_edit がバッチごとにまとめて行う
+    - 一括編集は1バッチを1トランザクションで保存するので version は使わない
+    """
+
+    version = None
+
+    class Meta(CustomUserEditForm.Meta):
+        fields = ("email", "birthday", "is_deleted")
+
+    def validate_unique(self):
+        pass
@@ -0,0 +1,67 @@
+"""
+パラメータを設定 PASSWORD_HASHER_PARAMS で調整できるパスワードハッシャー
+- アルゴリズム名は Django 標準と同じなので、既存のハッシュもそのまま検証できる
+- パラメータを変えると、次のログイン時に新しいパラメータで再ハッシュされる
+
+    PASSWORD_HASHER_PARAMS = {
+        "pbkdf2": {"iterations": 600000},
+        "scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 1},
+        "argon2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1},
+    }
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _param(algorithm, name, default):
+    params = getattr(settings, "PASSWORD_HASHER_PARAMS", {}).get(algorithm, {})
+    return params.get(name, default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _param("pbkdf2", "iterations", hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _param(
+            "scrypt", "work_factor", hashers.ScryptPasswordHasher.work_factor
+        )
+
+    @property
+    def block_size(self):
+        return _param("scrypt", "block_size", hashers.ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _param(
+            "scrypt", "parallelism", hashers.ScryptPasswordHasher.parallelism
+        )
+
+    @property
+    def maxmem(self):
+        return _param("scrypt", "maxmem", hashers.ScryptPasswordHasher.maxmem)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """argon2-cffi が必要(インストールされていなければ使われたときにエラー)"""
+
+    @property
+    def time_cost(self):
+        return _param("argon2", "time_cost", hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _param(
+            "argon2", "memory_cost", hashers.Argon2PasswordHasher.memory_cost
+        )
+
+    @property
+    def parallelism(self):
+        return _param(
+            "argon2", "parallelism", hashers.Argon2PasswordHasher.parallelism
+        )
@@ -0,0 +1,147 @@
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from . import counts
+
+# CSVインポートで期待するヘッダー
+EXPECTED_HEADERS = ["Username", "Email"]
+
+# エラーレポートのヘッダー
+REPORT_HEADERS = ["行", "ユーザー名", "メールアドレス", "内容"]
+
+
+class InvalidHeader(ValueError):
+    """CSVヘッダーが正しくない場合の例外"""
+
+
+class ImportResult:
+    """インポート結果(成功件数・スキップ件数・エラー行)"""
+
+    def __init__(self):
+        self.success_count = 0
+        self.skipped_count = 0
+        self.errors = []  # (行番号, ユーザー名, メールアドレス, 内容)
+
+    @property
+    def error_count(self):
+        # スキップした行はエラー件数に含めない
+        return len(self.errors) - self.skipped_count
+
+    def add_error(self, line, username, email, message):
+        self.errors.append((line, username, email, message))
+
+    def write_report(self, f):
+        """エラー行をCSVとして書き出す(BOM付き)"""
+        f.write("\ufeff")
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(self.errors)
+
+
+def open_csv(uploaded_file):
+    """アップロードファイルを全件読み込まず、少しずつデコードして読む"""
+    return io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+
+
+def import_users(text_file, batch_size=1000, progress=None):
+    """
+    CSV(Username, Email)からユーザーを一括登録する
+    - batch_size 行ごとに既存ユーザーをまとめて検索し、bulk_create で登録
+    - 既存ユーザー名はスキップ、それ以外の不正行はエラーとして記録
+    - progress(処理済み行数, 結果) を渡すとバッチごとに呼ばれる
+    """
+    reader = csv.reader(text_file)
+    headers = next(reader, None)
+    if headers != EXPECTED_HEADERS:
+        raise InvalidHeader(headers)
+
+    result = ImportResult()
+    # ファイル内での重複チェック用
+    seen_usernames = set()
+    seen_emails = set()
+
+    batch = []
+    processed = 0
+    for i, row in enumerate(reader, start=2):  # 2行目からデータ開始
+        batch.append((i, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, result, seen_usernames, seen_emails)
+            processed += len(batch)
+            batch = []
+            if progress:
+                progress(processed, result)
+    if batch:
+        _import_batch(batch, result, seen_usernames, seen_emails)
+        processed += len(batch)
+        if progress:
+            progress(processed, result)
+    return result
+
+
+def _import_batch(batch, result, seen_usernames, seen_emails):
+    User = get_user_model()
+
+    # 形式チェック
+    candidates = []
+    for i, row in batch:
+        username = (row[0] if len(row) > 0 else "").strip()
+        email = (row[1] if len(row) > 1 else "").strip()
+
+        # 必須項目チェック
+        if not username or not email:
+            result.add_error(
+                i, username, email, "ユーザー名またはメールアドレスが空です。"
+            )
+            continue
+
+        # メール形式チェック
+        try:
+            validate_email(email)
+        except ValidationError:
+            result.add_error(i, username, email, "メールアドレス形式が不正です。")
+            continue
+
+        candidates.append((i, username, email))
+
+    # 既存ユーザーをまとめて検索(1バッチあたり2クエリ、削除済みも含めて一意)
+    usernames = {username for _, username, _ in candidates}
+    emails = {email for _, _, email in candidates}
+    existing_usernames = set(
+        User.all_with_deleted.filter(username__in=usernames).values_list(
+            "username", flat=True
+        )
+    )
+    existing_emails = set(
+        User.all_with_deleted.filter(email__in=emails).values_list(
+            "email", flat=True
+        )
+    )
+
+    new_users = []
+    for i, username, email in candidates:
+        # 既存ユーザー重複チェック
+        if username in existing_usernames or username in seen_usernames:
+            result.add_error(
+                i, username, email, "ユーザーは既に存在します。スキップしました。"
+            )
+            result.skipped_count += 1
+            continue
+        if email in existing_emails or email in seen_emails:
+            result.add_error(
+                i, username, email, "メールアドレスは既に登録されています。"
+            )
+            continue
+
+        seen_usernames.add(username)
+        seen_emails.add(email)
+        new_users.append(User(username=username, email=email))
+
+    # 作成(bulk_create は post_save を送らないので、件数キャッシュはここで無効にする)
+    User.objects.bulk_create(new_users)
+    if new_users:
+        counts.invalidate()
+    result.success_count += len(new_users)
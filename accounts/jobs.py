@@ -0,0 +1,174 @@
+"""
+CSVインポート・エクスポートをリクエストの外で実行するジョブランナー
+- 外部のブローカーは使わず、プロセス内のスレッドプールで実行する
+- 状態と進捗は CsvJob テーブルに保存するので、どのワーカーからでも参照できる
+- 設定 CSV_JOBS_EAGER = True のときはその場で実行する(テスト用)
+"""
+
+import io
+import logging
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection
+from django.urls import reverse
+
+from .exporter import export_rows, stream_users_csv
+from .filters import filter_users
+from .importer import InvalidHeader, import_users, open_csv
+from .models import CsvJob, CustomUser
+from .routers import replicas
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """スレッドプールは最初に使われたときに作る"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "CSV_JOBS_MAX_WORKERS", 2),
+            thread_name_prefix="csv-job",
+        )
+    return _executor
+
+
+def _submit(job):
+    if getattr(settings, "CSV_JOBS_EAGER", False):
+        run_job(job.pk)
+        job.refresh_from_db()
+    else:
+        get_executor().submit(_run_in_thread, job.pk)
+    return job
+
+
+def submit_import(uploaded_file):
+    """アップロードファイルを保存し、インポートジョブを登録する"""
+    source = default_storage.save(f"jobs/{uuid.uuid4().hex}.csv", uploaded_file)
+    job = CsvJob.objects.create(kind=CsvJob.KIND_IMPORT, source=source)
+    return _submit(job)
+
+
+def submit_export(params, using=DEFAULT_DB_ALIAS):
+    """
+    検索条件を保存し、エクスポートジョブを登録する
+    - using は読み込むDB。リクエストの read_db() を渡すと、書き込んだ直後のユーザーは
+      default から読む(ジョブの登録も書き込みなので、登録する前に決めておく)
+    """
+    job = CsvJob.objects.create(
+        kind=CsvJob.KIND_EXPORT, params={**params, "database": using}
+    )
+    return _submit(job)
+
+
+def _run_in_thread(job_id):
+    # スレッドごとのDB接続を使い終わったら閉じる
+    close_old_connections()
+    try:
+        run_job(job_id)
+    except Exception:
+        # ジョブの状態を更新できなかった場合もログには残す
+        logger.exception("CSV job %s could not be run", job_id)
+    finally:
+        connection.close()
+
+
+def run_job(job_id):
+    """ジョブを実行して結果を CsvJob に記録する"""
+    job = CsvJob.objects.get(pk=job_id)
+    CsvJob.objects.filter(pk=job.pk).update(status=CsvJob.STATUS_RUNNING)
+    try:
+        if job.kind == CsvJob.KIND_IMPORT:
+            _run_import(job)
+        else:
+            _run_export(job)
+    except Exception as e:
+        logger.exception("CSV job %s failed", job.pk)
+        job.status = CsvJob.STATUS_FAILED
+        job.message = str(e) or e.__class__.__name__
+    else:
+        job.status = CsvJob.STATUS_DONE
+    job.save()
+
+
+def _run_import(job):
+    def progress(processed, result):
+        CsvJob.objects.filter(pk=job.pk).update(
+            processed=processed,
+            success_count=result.success_count,
+        )
+
+    try:
+        with default_storage.open(job.source, "rb") as f:
+            result = import_users(
+                open_csv(f),
+                batch_size=getattr(settings, "CSV_IMPORT_BATCH_SIZE", 1000),
+                progress=progress,
+            )
+    except InvalidHeader:
+        raise ValueError("CSVヘッダーが正しくありません。")
+    except UnicodeDecodeError:
+        raise ValueError("CSVファイルはUTF-8で保存してください。")
+    finally:
+        # アップロードされたファイルは不要になったら消す
+        default_storage.delete(job.source)
+
+    job.processed = result.success_count + len(result.errors)
+    job.success_count = result.success_count
+    job.skipped_count = result.skipped_count
+    job.error_count = result.error_count
+
+    # エラー行はレポートファイルにまとめる
+    if result.errors:
+        report = io.StringIO()
+        result.write_report(report)
+        job.result = default_storage.save(
+            f"jobs/{uuid.uuid4().hex}_errors.csv",
+            ContentFile(report.getvalue().encode("utf-8")),
+        )
+
+
+def _run_export(job):
+    # 登録時に決めたDB(通常はレプリカ)から読む(default への書き込みを遅くしない)
+    using = job.params.get("database", DEFAULT_DB_ALIAS)
+    if using not in replicas():
+        using = DEFAULT_DB_ALIAS
+    users = filter_users(job.params, CustomUser.objects.using(using))
+    rows = export_rows(users)
+    processed = 0
+    with tempfile.TemporaryFile() as tmp:
+        for i, chunk in enumerate(stream_users_csv(rows)):
+            tmp.write(chunk.encode("utf-8"))
+            if i:  # 先頭はヘッダー行
+                processed += chunk.count("\n")
+                CsvJob.objects.filter(pk=job.pk).update(processed=processed)
+        tmp.seek(0)
+        job.result = default_storage.save(f"jobs/{uuid.uuid4().hex}.csv", File(tmp))
+    job.processed = processed
+    job.success_count = processed
+
+
+def job_status(job):
+    """ステータス確認用の辞書"""
+    data = {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "processed": job.processed,
+        "success_count": job.success_count,
+        "skipped_count": job.skipped_count,
+        "error_count": job.error_count,
+        "message": job.message,
+        "status_url": reverse("accounts:job_status", kwargs={"pk": job.pk}),
+        "download_url": None,
+    }
+    if job.status == CsvJob.STATUS_DONE and job.result:
+        data["download_url"] = reverse("accounts:job_download", kwargs={"pk": job.pk})
+    return data
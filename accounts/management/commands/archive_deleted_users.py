@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.archive import (
+    FileArchive,
+    TableArchive,
+    archive_users,
+    candidates,
+    cutoff_for,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "論理削除から一定日数たったユーザーを ArchivedUser テーブル、"
+        "または gzip 圧縮の JSONL/CSV ファイルに移して物理削除します。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "USER_ARCHIVE_AFTER_DAYS", 365),
+            help="削除から何日たったユーザーを対象にするか",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "USER_ARCHIVE_BATCH_SIZE", 1000),
+            help="1回のトランザクションで移す件数",
+        )
+        parser.add_argument(
+            "--file",
+            help="アーカイブファイル(.jsonl.gz / .csv.gz)。省略時は ArchivedUser テーブル",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="対象件数を表示するだけで、何も変更しない",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--days は0以上、--batch-size は1以上にしてください。")
+
+        if options["file"]:
+            try:
+                target = FileArchive(options["file"])
+            except ValueError as e:
+                raise CommandError(e)
+        else:
+            target = TableArchive()
+
+        cutoff = cutoff_for(options["days"])
+        if options["dry_run"]:
+            count = candidates(cutoff).count()
+            batches = -(-count // options["batch_size"])
+            self.stdout.write(
+                f"[dry-run] {count} users deleted before {cutoff:%Y-%m-%d %H:%M} "
+                f"would be archived in {batches} batches"
+            )
+            pending = target.pending()
+            if pending:
+                self.stdout.write(
+                    f"[dry-run] {len(pending)} users from an interrupted run "
+                    "would be removed"
+                )
+            return
+
+        def progress(stats):
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  batch {stats.batches}: {stats}")
+
+        stats = archive_users(
+            cutoff, target, batch_size=options["batch_size"], progress=progress
+        )
+        if stats.resumed:
+            self.stdout.write(
+                f"Removed {stats.resumed} users archived by an interrupted run"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Archived {stats}"))
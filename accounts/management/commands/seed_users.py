@@ -0,0 +1,89 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from accounts.seeding import deferred_indexes, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        "負荷試験用のユーザーを大量に作成します"
+        "(作成日時・更新日時・誕生日を散らし、一部を論理削除済みにします)。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="作成する件数")
+        parser.add_argument(
+            "--start",
+            type=int,
+            help="ユーザー名の連番の開始値(省略時は既存ユーザーの最大IDの次)",
+        )
+        parser.add_argument(
+            "--deleted-fraction",
+            type=float,
+            default=0.05,
+            help="論理削除済みにする割合(0〜1)",
+        )
+        parser.add_argument(
+            "--days", type=int, default=3 * 365, help="作成日時を散らす日数"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="1トランザクションで INSERT する件数",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="乱数のシード")
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="作成中は一意でない索引を外し、最後に作り直す(大量作成時に速い)",
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        if count < 1 or options["batch_size"] < 1:
+            raise CommandError("件数と --batch-size は1以上にしてください。")
+        if not 0 <= options["deleted_fraction"] <= 1:
+            raise CommandError("--deleted-fraction は0〜1で指定してください。")
+
+        start = options["start"]
+        if start is None:
+            User = get_user_model()
+            start = (User.all_with_deleted.aggregate(Max("pk"))["pk__max"] or 0) + 1
+
+        started = time.perf_counter()
+
+        def progress(inserted):
+            if options["verbosity"] >= 2:
+                seconds = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {inserted}/{count} users  {inserted / seconds:,.0f} users/s"
+                )
+
+        def run():
+            return seed_users(
+                count,
+                start=start,
+                batch_size=options["batch_size"],
+                deleted_fraction=options["deleted_fraction"],
+                days=options["days"],
+                seed=options["seed"],
+                progress=progress,
+            )
+
+        if options["defer_indexes"]:
+            with deferred_indexes():
+                inserted = run()
+        else:
+            inserted = run()
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {inserted} users (user{start:07d}〜) in {seconds:.1f}s "
+                f"({inserted / seconds:,.0f} users/s)"
+            )
+        )
@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from accounts.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "default の SQLite データベースを、DATABASE_REPLICAS の各レプリカの"
+        "ファイルにコピーします(SQLite のオンラインバックアップを使います)。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "aliases",
+            nargs="*",
+            help="コピー先のエイリアス(省略時は DATABASE_REPLICAS のすべて)",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or replicas()
+        if not aliases:
+            raise CommandError("DATABASE_REPLICAS にレプリカが設定されていません。")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("SQLite 以外はデータベースのレプリケーションを使ってください。")
+        primary.ensure_connection()
+
+        for alias in aliases:
+            replica = connections[alias]
+            if replica.vendor != "sqlite":
+                raise CommandError(f"{alias} は SQLite ではありません。")
+            # レプリカの接続を閉じてから、ファイルを丸ごと書き換える
+            replica.close()
+            started = time.perf_counter()
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                # 書き込みを止めずに、ページ単位で少しずつコピーする
+                primary.connection.backup(target, pages=1024)
+            finally:
+                target.close()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Copied {DEFAULT_DB_ALIAS} to {alias} "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            )
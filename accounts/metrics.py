@@ -0,0 +1,203 @@
+"""
+リクエストごとの計測(SQL件数・SQL時間・テンプレート描画時間・メモリ)
+- RequestMetricsMiddleware を MIDDLEWARE に入れ、REQUEST_METRICS_ENABLED で切り替える
+- DEBUG に依存せず、DB接続の execute_wrapper で数えるので本番でも使える
+- 計測中かどうかは ContextVar で持つので、非同期ビュー(sync_to_async 先のスレッド)でも数えられる
+- track() を使えば、テストやシェルで任意の処理を計測できる
+- StreamingHttpResponse は、レスポンスを返すまでの分だけを計測する
+- メモリのピークは REQUEST_METRICS_TRACEMALLOC のときだけ出す
+  (ru_maxrss はプロセスが起動してからの最大値で、リクエストごとの値にならないため)
+"""
+
+import contextvars
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger("accounts.metrics")
+slow_query_logger = logging.getLogger("accounts.metrics.slow_query")
+
+# 計測中の RequestMetrics(入れ子で計測できるようにタプルで持つ)
+_active = contextvars.ContextVar("request_metrics", default=())
+
+
+class RequestMetrics:
+    """1回の計測結果"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.seconds = 0.0
+        self.peak_memory_kb = None
+        self.slow_queries = []  # (秒, SQL)
+
+    def as_dict(self):
+        data = {
+            "queries": self.queries,
+            "query_ms": round(self.query_seconds * 1000, 2),
+            "template_ms": round(self.template_seconds * 1000, 2),
+            "total_ms": round(self.seconds * 1000, 2),
+            "slow_queries": len(self.slow_queries),
+        }
+        if self.peak_memory_kb is not None:
+            data["peak_memory_kb"] = self.peak_memory_kb
+        return data
+
+
+def _slow_query_seconds():
+    ms = getattr(settings, "REQUEST_METRICS_SLOW_QUERY_MS", None)
+    return None if ms is None else ms / 1000
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    active = _active.get()
+    if not active:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        threshold = _slow_query_seconds()
+        for metrics in active:
+            metrics.queries += 1
+            metrics.query_seconds += elapsed
+            if threshold is not None and elapsed >= threshold:
+                metrics.slow_queries.append((elapsed, sql))
+        if threshold is not None and elapsed >= threshold:
+            slow_query_logger.warning("slow query %.1fms: %s", elapsed * 1000, sql)
+
+
+def _install(connection):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    """新しく作られた接続(ジョブ・sync_to_async のスレッドなど)にも仕掛ける"""
+    _install(connection)
+
+
+def _peak_memory_kb():
+    # REQUEST_METRICS_TRACEMALLOC は重いので調査用(track() の開始時にピークを戻す)
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1] // 1024
+    return None
+
+
+@contextmanager
+def track():
+    """
+    with 内で実行したSQL・テンプレート描画を計測する
+
+        with track() as m:
+            ...
+        m.queries, m.query_seconds
+    """
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+    metrics = RequestMetrics()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    token = _active.set(_active.get() + (metrics,))
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.seconds = time.perf_counter() - start
+        metrics.peak_memory_kb = _peak_memory_kb()
+        _active.reset(token)
+
+
+class Template(DjangoTemplate):
+    """描画時間を計測中の RequestMetrics に足すテンプレート"""
+
+    def render(self, context=None, request=None):
+        active = _active.get()
+        if not active:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed = time.perf_counter() - start
+            for metrics in active:
+                metrics.template_seconds += elapsed
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    TEMPLATES の BACKEND に指定するテンプレートエンジン
+    (描画内容は DjangoTemplates と同じ。{% include %} は親の時間に含まれる)
+    """
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+def _report(request, response, metrics):
+    data = metrics.as_dict()
+    if getattr(settings, "REQUEST_METRICS_HEADERS", False):
+        response["X-Query-Count"] = str(metrics.queries)
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={data["query_ms"]};desc="{metrics.queries} queries"',
+                f"tpl;dur={data['template_ms']}",
+                f"total;dur={data['total_ms']}",
+            ]
+        )
+        if metrics.peak_memory_kb is not None:
+            response["X-Peak-Memory-Kb"] = str(metrics.peak_memory_kb)
+    if getattr(settings, "REQUEST_METRICS_LOG", True):
+        data.update(
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+        )
+        logger.info("request_metrics %s", json.dumps(data))
+
+
+@sync_and_async_middleware
+def RequestMetricsMiddleware(get_response):
+    """リクエストごとに track() で計測し、ヘッダーまたはログに出す"""
+    if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+        raise MiddlewareNotUsed
+
+    if getattr(settings, "REQUEST_METRICS_TRACEMALLOC", False):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with track() as metrics:
+                response = await get_response(request)
+            _report(request, response, metrics)
+            return response
+
+    else:
+
+        def middleware(request):
+            with track() as metrics:
+                response = get_response(request)
+            _report(request, response, metrics)
+            return response
+
+    return middleware
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_customuser_created_at_customuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('import', 'インポート'), ('export', 'エクスポート')], max_length=10, verbose_name='種類')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('done', '完了'), ('failed', '失敗')], default='pending', max_length=10, verbose_name='状態')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='検索条件')),
+                ('source', models.CharField(blank=True, max_length=255, verbose_name='入力ファイル')),
+                ('result', models.CharField(blank=True, max_length=255, verbose_name='出力ファイル')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='処理済み行数')),
+                ('success_count', models.PositiveIntegerField(default=0, verbose_name='成功件数')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='スキップ件数')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='エラー件数')),
+                ('message', models.TextField(blank=True, verbose_name='メッセージ')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,81 @@
+# ユーザー名・メールアドレスの部分一致検索用 FTS5(trigram) インデックス
+# SQLite 以外、または trigram トークナイザが使えない SQLite では何もしない
+# (accounts.search が contains / icontains にフォールバックする)
+
+from django.db import migrations, OperationalError
+
+SEARCH_TABLE = "accounts_customuser_search"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        username, email, tokenize='trigram case_sensitive 1', detail='none'
+    )
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE}(rowid, username, email)
+    SELECT id, username, lower(email) FROM accounts_customuser
+    """,
+    f"""
+    CREATE TRIGGER accounts_customuser_search_ai
+    AFTER INSERT ON accounts_customuser BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, username, email)
+        VALUES (new.id, new.username, lower(new.email));
+    END
+    """,
+    f"""
+    CREATE TRIGGER accounts_customuser_search_au
+    AFTER UPDATE OF username, email ON accounts_customuser BEGIN
+        UPDATE {SEARCH_TABLE}
+        SET username = new.username, email = lower(new.email)
+        WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER accounts_customuser_search_ad
+    AFTER DELETE ON accounts_customuser BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS accounts_customuser_search_ai",
+    "DROP TRIGGER IF EXISTS accounts_customuser_search_au",
+    "DROP TRIGGER IF EXISTS accounts_customuser_search_ad",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE temp.trigram_check "
+                "USING fts5(x, tokenize='trigram')"
+            )
+            cursor.execute("DROP TABLE temp.trigram_check")
+    except OperationalError:
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_customuser_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+# CustomUser の追加・削除・論理削除に件数を追従させるトリガー(SQLite のみ)
+COUNTER_TRIGGERS = [
+    """
+    CREATE TRIGGER accounts_usercounter_ai
+    AFTER INSERT ON accounts_customuser BEGIN
+        UPDATE accounts_usercounter
+        SET total = total + 1, deleted = deleted + new.is_deleted
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_usercounter_ad
+    AFTER DELETE ON accounts_customuser BEGIN
+        UPDATE accounts_usercounter
+        SET total = total - 1, deleted = deleted - old.is_deleted
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_usercounter_au
+    AFTER UPDATE OF is_deleted ON accounts_customuser BEGIN
+        UPDATE accounts_usercounter
+        SET deleted = deleted + new.is_deleted - old.is_deleted
+        WHERE id = 1;
+    END
+    """,
+]
+
+
+def create_counter(apps, schema_editor):
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    UserCounter = apps.get_model("accounts", "UserCounter")
+    db = schema_editor.connection.alias
+    UserCounter.objects.using(db).create(
+        pk=1,
+        total=CustomUser.objects.using(db).count(),
+        deleted=CustomUser.objects.using(db).filter(is_deleted=True).count(),
+    )
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in COUNTER_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+def drop_counter(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for name in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS accounts_usercounter_{name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.BigIntegerField(default=0, verbose_name='全件数')),
+                ('deleted', models.BigIntegerField(default=0, verbose_name='削除済み件数')),
+            ],
+        ),
+        migrations.RunPython(create_counter, drop_counter),
+    ]
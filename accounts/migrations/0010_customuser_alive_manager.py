@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_customuser_manager'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='customuser',
+            options={'default_manager_name': 'all_with_deleted', 'verbose_name': 'user', 'verbose_name_plural': 'users'},
+        ),
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', accounts.models.AliveUserManager()),
+                ('all_with_deleted', accounts.models.CustomUserManager()),
+            ],
+        ),
+    ]
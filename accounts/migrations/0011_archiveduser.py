@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_customuser_alive_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='元のユーザーID')),
+                ('username', models.CharField(max_length=150, verbose_name='ユーザー名')),
+                ('email', models.EmailField(max_length=254, verbose_name='メールアドレス')),
+                ('deleted_at', models.DateTimeField(verbose_name='削除日時')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='アーカイブ日時')),
+                ('data', models.JSONField(default=dict, verbose_name='アーカイブ時の内容')),
+            ],
+        ),
+    ]
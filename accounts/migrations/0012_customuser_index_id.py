@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_archiveduser'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='customuser_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='customuser_alive_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-updated_at', '-created_at', '-id'], name='customuser_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-updated_at', '-created_at', '-id'], name='customuser_alive_updated_idx'),
+        ),
+    ]
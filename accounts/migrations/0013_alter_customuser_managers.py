@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:03
+
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_customuser_index_id'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('all_with_deleted', accounts.models.CustomUserManager()),
+            ],
+        ),
+    ]
@@ -1,5 +1,49 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.hashers import acheck_password, check_password
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import models, router, transaction
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .passwords import ahash_password, hash_password
+
+# 一括で論理削除した後に送るシグナル(pks: 削除したユーザーIDのリスト)
+users_soft_deleted = Signal()
+
+# 一括編集(bulk_update)した後に送るシグナル(pks: 更新したユーザーIDのリスト)
+users_bulk_updated = Signal()
+
+
+class CustomUserQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        まとめて論理削除する(1行ずつ save() せず、1回の UPDATE で済ませる)
+        - 削除済みの行は対象外
+        - キャッシュの無効化は users_soft_deleted シグナルで行う
+        """
+        targets = self.filter(is_deleted=False)
+        with transaction.atomic(using=self.db):
+            pks = list(targets.values_list("pk", flat=True))
+            count = targets.update(
+                is_deleted=True, is_active=False, updated_at=timezone.now()
+            )
+        if pks:
+            users_soft_deleted.send(sender=self.model, pks=pks)
+        return count
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    """削除済みも含めた全ユーザー"""
+
+
+class AliveUserManager(CustomUserManager):
+    """削除済みを除いたユーザー(部分インデックス customuser_alive_updated_idx を使う)"""
+
+    # マイグレーションでは削除済みも含めて扱うので、UserManager の True を引き継がない
+    use_in_migrations = False
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
 
 
 class CustomUser(AbstractUser):
@@ -28,11 +72,159 @@ class CustomUser(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)  # ← 作成日時
     updated_at = models.DateTimeField(auto_now=True)  # ← 更新日時
 
+    # objects は削除済みを除く。一意チェックや管理画面など Django 内部で使う
+    # デフォルトマネージャー(_default_manager)は削除済みも含める
+    objects = AliveUserManager()
+    all_with_deleted = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        default_manager_name = "all_with_deleted"
+        indexes = [
+            # 一覧・CSVの並び順(更新日時, 作成日時, ID の降順)と更新日時の範囲検索
+            models.Index(
+                fields=["-updated_at", "-created_at", "-id"],
+                name="customuser_updated_idx",
+            ),
+            # 作成日時の範囲検索
+            models.Index(fields=["created_at"], name="customuser_created_idx"),
+            # 削除されていないユーザーだけの部分インデックス
+            models.Index(
+                fields=["-updated_at", "-created_at", "-id"],
+                condition=models.Q(is_deleted=False),
+                name="customuser_alive_updated_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.username
 
+    # ログイン時の再ハッシュはスレッドプールで行う(Django の setter と同じく保存してから返す)
+    def check_password(self, raw_password):
+        def setter(raw):
+            self.password = hash_password(raw)
+            # 再ハッシュはパスワードの変更ではない
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        async def setter(raw):
+            self.password = await ahash_password(raw)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return await acheck_password(raw_password, self.password, setter)
+
     # 論理削除
     def delete(self, using=None, keep_parents=False):
         self.is_deleted = True
         self.is_active = False
         self.save()
+
+    def save_if_unchanged(self, version, update_fields):
+        """
+        読み込んだ時から更新されていなければ update_fields の列だけを保存する(楽観的排他制御)
+        - version は読み込んだ時の updated_at
+        - UPDATE ... WHERE id = ? AND updated_at = ? の1文なので行ロックを取らない
+        - 保存できたら True(updated_at も新しくなる)。ほかで更新されていたら何もせず False
+        - 保存できたときは save() と同じく post_save シグナルを送る
+        """
+        update_fields = [f for f in update_fields if f != "updated_at"]
+        attnames = [self._meta.get_field(f).attname for f in update_fields]
+        values = {name: getattr(self, name) for name in attnames}
+        updated_at = timezone.now()
+        using = router.db_for_write(type(self), instance=self)
+        updated = (
+            type(self)
+            .all_with_deleted.using(using)
+            .filter(pk=self.pk, updated_at=version)
+            .update(updated_at=updated_at, **values)
+        )
+        if not updated:
+            return False
+        self.updated_at = updated_at
+        post_save.send(
+            sender=type(self),
+            instance=self,
+            created=False,
+            update_fields=frozenset(update_fields + ["updated_at"]),
+            raw=False,
+            using=using,
+        )
+        return True
+
+
+class UserCounter(models.Model):
+    """
+    ユーザー件数を保持する1行だけのテーブル
+    - SQLite ではトリガーで CustomUser の追加・削除・論理削除に追従する
+    - 一覧の件数表示で COUNT(*) のフルスキャンをしないために使う
+    """
+
+    total = models.BigIntegerField(default=0, verbose_name="全件数")
+    deleted = models.BigIntegerField(default=0, verbose_name="削除済み件数")
+
+    def __str__(self):
+        return f"{self.total} ({self.deleted} deleted)"
+
+
+class ArchivedUser(models.Model):
+    """
+    論理削除から一定期間たち、メインテーブルから移したユーザー
+    - archive_deleted_users コマンドで作る
+    - パスワードハッシュは保存しない
+    """
+
+    original_id = models.BigIntegerField(unique=True, verbose_name="元のユーザーID")
+    username = models.CharField(max_length=150, verbose_name="ユーザー名")
+    email = models.EmailField(verbose_name="メールアドレス")
+    deleted_at = models.DateTimeField(verbose_name="削除日時")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="アーカイブ日時")
+    data = models.JSONField(default=dict, verbose_name="アーカイブ時の内容")
+
+    def __str__(self):
+        return f"{self.username} (#{self.original_id})"
+
+
+class CsvJob(models.Model):
+    """CSVインポート・エクスポートのバックグラウンドジョブ"""
+
+    KIND_IMPORT = "import"
+    KIND_EXPORT = "export"
+    KIND_CHOICES = [
+        (KIND_IMPORT, "インポート"),
+        (KIND_EXPORT, "エクスポート"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "待機中"),
+        (STATUS_RUNNING, "実行中"),
+        (STATUS_DONE, "完了"),
+        (STATUS_FAILED, "失敗"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="種類")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="状態",
+    )
+    params = models.JSONField(default=dict, blank=True, verbose_name="検索条件")
+    source = models.CharField(max_length=255, blank=True, verbose_name="入力ファイル")
+    result = models.CharField(max_length=255, blank=True, verbose_name="出力ファイル")
+    processed = models.PositiveIntegerField(default=0, verbose_name="処理済み行数")
+    success_count = models.PositiveIntegerField(default=0, verbose_name="成功件数")
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name="スキップ件数")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="エラー件数")
+    message = models.TextField(blank=True, verbose_name="メッセージ")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
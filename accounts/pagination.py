@@ -0,0 +1,138 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """カーソル文字列が壊れている場合の例外"""
+
+
+class KeysetPage:
+    """1ページ分の結果と前後ページのカーソルを保持する"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginator:
+    """
+    (updated_at, created_at, id) の降順に対するカーソル(キーセット)ページネーション
+    - OFFSET を使わず、直前ページの最後の行より「後ろ」を WHERE で絞り込む
+    - 何ページ目でも 1ページ分 + 1行 しか読まないのでコストが一定
+    """
+
+    fields = ("updated_at", "created_at", "id")
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    # 行(モデル or values() の dict)からキーを取り出す
+    def _key(self, row):
+        if isinstance(row, dict):
+            return tuple(row[f] for f in self.fields)
+        return tuple(getattr(row, f) for f in self.fields)
+
+    def encode_cursor(self, row, direction):
+        updated_at, created_at, pk = self._key(row)
+        raw = f"{direction}|{updated_at.isoformat()}|{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            direction, updated_at, created_at, pk = raw.split("|")
+            key = (parse_datetime(updated_at), parse_datetime(created_at), int(pk))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in ("n", "p") or None in key:
+            raise InvalidCursor(cursor)
+        return direction, key
+
+    # キーより後ろ(降順で次)の行を表す条件
+    # 先頭の updated_at__lte はインデックスでカーソルの位置まで飛ぶための範囲
+    # (OR だけだと SQLite はインデックスを先頭から読むので、深いページほど遅くなる)
+    def _after(self, key):
+        updated_at, created_at, pk = key
+        return Q(updated_at__lte=updated_at) & (
+            Q(updated_at__lt=updated_at)
+            | Q(updated_at=updated_at, created_at__lt=created_at)
+            | Q(updated_at=updated_at, created_at=created_at, id__lt=pk)
+        )
+
+    # キーより前(降順で前)の行を表す条件
+    def _before(self, key):
+        updated_at, created_at, pk = key
+        return Q(updated_at__gte=updated_at) & (
+            Q(updated_at__gt=updated_at)
+            | Q(updated_at=updated_at, created_at__gt=created_at)
+            | Q(updated_at=updated_at, created_at=created_at, id__gt=pk)
+        )
+
+    def _query(self, cursor):
+        """カーソルから (取得するクエリセット, 向き) を決める"""
+        if not cursor:
+            qs = self.queryset.order_by("-updated_at", "-created_at", "-id")
+            return qs[: self.per_page + 1], None
+        direction, key = self.decode_cursor(cursor)
+        if direction == "n":
+            qs = self.queryset.filter(self._after(key))
+            qs = qs.order_by("-updated_at", "-created_at", "-id")
+        else:
+            # 逆順で取得してから並べ直す
+            qs = self.queryset.filter(self._before(key))
+            qs = qs.order_by("updated_at", "created_at", "id")
+        return qs[: self.per_page + 1], direction
+
+    def _build_page(self, rows, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == "p":
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction == "n"
+
+        next_cursor = None
+        previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], "n")
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], "p")
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        """
+        カーソルに対応するページを返す
+        - cursor が None なら先頭ページ
+        - 壊れたカーソルは InvalidCursor
+        """
+        qs, direction = self._query(cursor)
+        return self._build_page(list(qs), direction)
+
+    async def apage(self, cursor=None):
+        """page() の非同期版"""
+        qs, direction = self._query(cursor)
+        return self._build_page([row async for row in qs], direction)
@@ -0,0 +1,58 @@
+"""
+パスワードのハッシュ化をリクエストのスレッドの外で行う
+- ハッシュ化は CPU を数十ミリ秒使うので、同時に実行する数をスレッドプールで制限する
+  (hashlib の PBKDF2 / scrypt は GIL を解放するので並列に動く)
+- ログイン時の再ハッシュ(パラメータ変更後の更新)も同じプールで行う
+  (結果を待ってから保存する。login() が新しいハッシュでセッションを作るため)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _workers():
+    return getattr(settings, "PASSWORD_HASHING_WORKERS", 2)
+
+
+def get_executor():
+    """スレッドプールと、待ち行列の上限を決めるセマフォを最初に使うときに作る"""
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_workers(), thread_name_prefix="password-hash"
+            )
+            queue = getattr(settings, "PASSWORD_HASHING_QUEUE", 32)
+            _slots = threading.BoundedSemaphore(_workers() + queue)
+    return _executor
+
+
+def _submit(func, *args):
+    executor = get_executor()
+    # 待ち行列がいっぱいなら空くまで待つ
+    _slots.acquire()
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda f: _slots.release())
+    return future
+
+
+def hash_password(raw_password):
+    """スレッドプールでハッシュ化し、結果を返す"""
+    return _submit(make_password, raw_password).result()
+
+
+async def ahash_password(raw_password):
+    """hash_password() の非同期版(イベントループを止めずに待つ)"""
+    return await asyncio.wrap_future(_submit(make_password, raw_password))
@@ -0,0 +1,139 @@
+"""
+読み込みを読み込み専用レプリカに振り分けるDBルーター
+- レプリカは settings.DATABASE_REPLICAS に DATABASES のエイリアスで指定する(空なら全て default)
+- レプリカを読むのはユーザー(CustomUser)だけで、ReplicaRoutingMiddleware が許可した
+  GET/HEAD リクエストの中と、replica_db() を using() に渡したクエリセットに限る
+  (セッション・ジョブなどのほかのモデルや、管理コマンド・シェルなどの読み込みは default)
+- リクエスト中に書き込んだら、そのリクエストの残りと、その後 REPLICA_PIN_SECONDS 秒の
+  同じユーザーのリクエストは default を読む(レプリカの遅れで書いた内容が見えないのを防ぐ)
+- ストリーミングのレスポンスなど、ミドルウェアを抜けた後に評価するクエリセットは
+  using(read_db()) で読み込み先を決めておく
+"""
+
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+# 書き込んだユーザーに付ける Cookie
+PIN_COOKIE = "primary_pin"
+
+# 書き込んでもレプリカの読み込みを止めないアプリ(セッションの保存など)
+UNPINNED_APPS = {"sessions"}
+
+
+def _routed(model):
+    """
+    レプリカから読むモデル(ユーザーだけ)
+    - セッション・権限・ContentType・CsvJob などは書いた直後に読み直すので default
+    """
+    return model._meta.label == settings.AUTH_USER_MODEL
+
+
+class RoutingState:
+    """1リクエスト分の振り分け状態(sync_to_async 先と共有するため属性を書き換える)"""
+
+    def __init__(self, replica_reads):
+        self.replica_reads = replica_reads
+        self.wrote = False
+
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def replica_db():
+    """レプリカを1つ選ぶ(なければ default)"""
+    aliases = replicas()
+    return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+
+def read_db():
+    """今のリクエストで読み込みに使うDB"""
+    state = _state.get()
+    if state is not None and state.replica_reads:
+        return replica_db()
+    return DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _routed(model):
+            return DEFAULT_DB_ALIAS
+        return read_db()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in UNPINNED_APPS:
+            state.replica_reads = False
+            state.wrote = True
+        # レプリカから読んだインスタンスでも、書き込みは必ず default
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # レプリカは default のコピーなのでマイグレーションしない
+        if db in replicas():
+            return False
+        return None
+
+
+def _start(request):
+    replica_reads = (
+        request.method in ("GET", "HEAD") and PIN_COOKIE not in request.COOKIES
+    )
+    state = RoutingState(replica_reads)
+    return state, _state.set(state)
+
+
+def _pin(response, state):
+    if state.wrote:
+        response.set_cookie(
+            PIN_COOKIE,
+            "1",
+            max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """GET/HEAD の読み込みをレプリカに振り分け、書き込んだユーザーは default に固定する"""
+    if not replicas():
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state, token = _start(request)
+            try:
+                response = await get_response(request)
+            finally:
+                _state.reset(token)
+            return _pin(response, state)
+
+    else:
+
+        def middleware(request):
+            state, token = _start(request)
+            try:
+                response = get_response(request)
+            finally:
+                _state.reset(token)
+            return _pin(response, state)
+
+    return middleware
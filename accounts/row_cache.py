@@ -0,0 +1,51 @@
+"""
+ユーザー一覧の行のフラグメントキャッシュ
+- キーは pk と updated_at(保存すると updated_at が変わるので、古い行は使われなくなる)
+- 日時の表示が変わらないよう、言語とタイムゾーンもキーに含める
+- 1ページ分を get_many / set_many でまとめて読み書きする(行ごとの往復をしない)
+- 使うキャッシュは設定 USER_ROW_CACHE(CACHES のエイリアス、None なら毎回描画)
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
+
+ROW_TEMPLATE = "accounts/user_row.html"
+
+
+def get_cache():
+    alias = getattr(settings, "USER_ROW_CACHE", "default")
+    return caches[alias] if alias else None
+
+
+def _key(user):
+    return (
+        f"accounts:user_row:{user.pk}:{user.updated_at.timestamp()}:"
+        f"{translation.get_language()}:{timezone.get_current_timezone_name()}"
+    )
+
+
+def render_rows(users):
+    """(ユーザー, 行のセルのHTML) のリストを返す。キャッシュにない行だけ描画する"""
+    users = list(users)
+    template = get_template(ROW_TEMPLATE)
+    cache = get_cache()
+    if cache is None:
+        return [(user, template.render({"user": user})) for user in users]
+
+    keys = [_key(user) for user in users]
+    cached = cache.get_many(keys)
+    missing = {}
+    rows = []
+    for user, key in zip(users, keys):
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = template.render({"user": user})
+        rows.append((user, mark_safe(html)))
+    if missing:
+        cache.set_many(
+            missing, getattr(settings, "USER_ROW_CACHE_TIMEOUT", 3600)
+        )
+    return rows
@@ -0,0 +1,69 @@
+"""
+ユーザー名・メールアドレスの部分一致検索
+- SQLite では FTS5 の trigram インデックス(accounts_customuser_search)を使う
+  LIKE '%x%' のようなフルスキャンにならず、3文字以上ならインデックスで絞り込める
+- インデックスはマイグレーションで作るトリガーで CustomUser と同期する
+  (bulk_create や update() でもずれない)
+- ユーザー名は大文字小文字を区別、メールアドレスは区別しない
+  (メールアドレスは小文字にして保存し、検索語も小文字にする)
+- インデックスが使えないDBでは contains / icontains にフォールバックする
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = "accounts_customuser_search"
+
+# DBごとにインデックスの有無をキャッシュする
+_available = {}
+
+
+def is_available(using="default"):
+    """検索インデックスが使えるかどうか"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    key = (using, str(connection.settings_dict["NAME"]))
+    if key not in _available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _available[key] = SEARCH_TABLE in tables
+    return _available[key]
+
+
+async def ais_available(using="default"):
+    """is_available() の非同期版(確認済みならDBにアクセスしない)"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    key = (using, str(connection.settings_dict["NAME"]))
+    if key not in _available:
+        await sync_to_async(is_available)(using)
+    return _available[key]
+
+
+def glob_escape(value):
+    """GLOB の特殊文字(* ? [)を [] で囲んでそのままの文字として扱う"""
+    return "".join(f"[{c}]" if c in "*?[" else c for c in value)
+
+
+def _matching_ids(column, value):
+    return RawSQL(
+        f"SELECT rowid FROM {SEARCH_TABLE} WHERE {column} GLOB %s",
+        (f"*{glob_escape(value)}*",),
+    )
+
+
+def filter_username(queryset, value):
+    """ユーザー名の部分一致(大文字小文字を区別する)"""
+    if not is_available(queryset.db):
+        return queryset.filter(username__contains=value)
+    return queryset.filter(id__in=_matching_ids("username", value))
+
+
+def filter_email(queryset, value):
+    """メールアドレスの部分一致(大文字小文字を区別しない)"""
+    if not is_available(queryset.db):
+        return queryset.filter(email__icontains=value)
+    return queryset.filter(id__in=_matching_ids("email", value.lower()))
@@ -0,0 +1,244 @@
+"""
+負荷試験・ベンチマーク用のユーザーを大量に作る(seed_users コマンド)
+- 乱数のシードを固定しているので、同じ引数なら毎回同じデータになる
+- モデルの save()/bulk_create() を通さず、executemany でまとめて INSERT する
+  (auto_now を上書きして作成日時・更新日時を過去の期間に散らすため)
+- パスワードハッシュは1回だけ計算し、全ユーザーで共有する
+- SQLite では、1行ごとに動く INSERT トリガー(検索インデックス・件数)をバッチの間だけ外し、
+  バッチの最後に INSERT ... SELECT / UPDATE 1回でまとめて反映する
+  (同じトランザクション内なので、他の接続からトリガーがない状態は見えない)
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import counts
+from .models import UserCounter
+from .search import SEARCH_TABLE
+
+DOMAINS = ["example.com", "example.jp", "example.org", "mail.example.net"]
+
+# INSERT する列(generate_users が返すタプルの順番)
+SEED_FIELDS = (
+    "password",
+    "is_superuser",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_staff",
+    "is_active",
+    "date_joined",
+    "birthday",
+    "is_deleted",
+    "created_at",
+    "updated_at",
+)
+
+_DELETED_INDEX = SEED_FIELDS.index("is_deleted")
+
+# バッチの間だけ外す INSERT トリガー
+SEARCH_TRIGGER = "accounts_customuser_search_ai"
+COUNTER_TRIGGER = "accounts_usercounter_ai"
+
+
+def generate_users(
+    count,
+    start=0,
+    deleted_fraction=0.05,
+    days=3 * 365,
+    seed=42,
+    password=None,
+    now=None,
+):
+    """
+    ユーザー1件分の値のタプル(SEED_FIELDS の順)を count 件返すジェネレータ
+    - 作成日時は過去 days 日に連番順に散らし、更新日時は作成日時から now までのどこか
+    - deleted_fraction の割合で論理削除済み(is_active も False)にする
+    """
+    rng = random.Random(seed + start)
+    now = now or timezone.now()
+    span = days * 24 * 3600
+    password = password or make_password("seed-password")
+    epoch = date(1950, 1, 1)
+    birthdays = 365 * 55
+    random_ = rng.random
+    first = now - timedelta(seconds=span)
+    step = span / count if count else 0
+    for i in range(start, start + count):
+        # 実際の登録と同じく、連番(ユーザー名・ID)の順に作成日時が進む
+        created_at = first + timedelta(seconds=(i - start + random_()) * step)
+        updated_at = created_at + (now - created_at) * random_()
+        birthday = epoch + timedelta(days=int(random_() * birthdays))
+        deleted = random_() < deleted_fraction
+        yield (
+            password,
+            False,
+            f"user{i:07d}",
+            "",
+            "",
+            f"user{i:07d}@{DOMAINS[i % len(DOMAINS)]}",
+            False,
+            # 論理削除(CustomUser.delete)と同じく、削除済みはログインできない
+            not deleted,
+            created_at,
+            birthday,
+            deleted,
+            created_at,
+            updated_at,
+        )
+
+
+def _converters(fields, connection):
+    # get_db_prep_save を1値ずつ呼ぶと遅いので、日付・日時の変換だけを直接使う
+    ops = connection.ops
+    converters = []
+    for field in fields:
+        internal_type = field.get_internal_type()
+        if internal_type not in ("DateTimeField", "DateField"):
+            converters.append(None)
+        elif connection.vendor == "sqlite":
+            # naive な日付・日時に対する adapt_*field_value と同じ(str にするだけ)
+            converters.append(str)
+        elif internal_type == "DateTimeField":
+            converters.append(ops.adapt_datetimefield_value)
+        else:
+            converters.append(ops.adapt_datefield_value)
+    return converters
+
+
+def _drop_triggers(cursor, names):
+    """存在するトリガーを削除し、作り直すための {名前: SQL} を返す"""
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master "
+        f"WHERE type = 'trigger' AND name IN ({placeholders})",
+        list(names),
+    )
+    triggers = dict(cursor.fetchall())
+    for name in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    return triggers
+
+
+def _insert_batch(connection, sql, rows, table):
+    if connection.vendor != "sqlite":
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        last_id = cursor.fetchone()[0]
+        triggers = _drop_triggers(cursor, [SEARCH_TRIGGER, COUNTER_TRIGGER])
+        cursor.executemany(sql, rows)
+
+        # トリガーがしていたことを、追加した行に対してまとめて行う
+        if SEARCH_TRIGGER in triggers:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, username, email) "
+                f"SELECT id, username, lower(email) FROM {table} WHERE id > %s",
+                [last_id],
+            )
+        if COUNTER_TRIGGER in triggers:
+            deleted = sum(1 for row in rows if row[_DELETED_INDEX])
+            cursor.execute(
+                f"UPDATE {UserCounter._meta.db_table} "
+                "SET total = total + %s, deleted = deleted + %s WHERE id = 1",
+                [len(rows), deleted],
+            )
+        for trigger_sql in triggers.values():
+            cursor.execute(trigger_sql)
+
+
+@contextmanager
+def deferred_indexes(using="default"):
+    """
+    with の間だけ CustomUser の Meta.indexes(一意でない索引)を外し、最後に作り直す
+    - 大量に INSERT するときは、1行ずつ索引を更新するより最後にまとめて作るほうが速い
+    - 外している間は一覧・検索が遅くなるので、負荷試験用のデータ作成でだけ使う
+    """
+    User = get_user_model()
+    indexes = User._meta.indexes
+    connection = connections[using]
+    with connection.schema_editor() as schema_editor:
+        for index in indexes:
+            schema_editor.remove_index(User, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                schema_editor.add_index(User, index)
+
+
+def seed_users(
+    count,
+    start=0,
+    batch_size=50000,
+    deleted_fraction=0.05,
+    days=3 * 365,
+    seed=42,
+    using="default",
+    progress=None,
+):
+    """
+    count 件のユーザーを batch_size 件ずつ1トランザクションで INSERT し、作成件数を返す
+    - ユーザー名は user{start:07d} から連番
+    - progress(作成済み件数) を渡すとバッチごとに呼ばれる
+    """
+    User = get_user_model()
+    connection = connections[using]
+    fields = [User._meta.get_field(name) for name in SEED_FIELDS]
+    table = connection.ops.quote_name(User._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+    converters = list(enumerate(_converters(fields, connection)))
+    converters = [(i, convert) for i, convert in converters if convert]
+    # DB接続のタイムゾーンの naive な日時で作ると、変換で make_naive を通らず速い
+    now = timezone.now()
+    if settings.USE_TZ:
+        now = timezone.make_naive(now, connection.timezone)
+
+    def flush(batch):
+        with transaction.atomic(using=using):
+            _insert_batch(connection, sql, batch, table)
+
+    batch = []
+    inserted = 0
+    rows = generate_users(
+        count,
+        start=start,
+        deleted_fraction=deleted_fraction,
+        days=days,
+        seed=seed,
+        now=now,
+    )
+    for values in rows:
+        values = list(values)
+        for i, convert in converters:
+            values[i] = convert(values[i])
+        batch.append(values)
+        if len(batch) >= batch_size:
+            flush(batch)
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(inserted)
+    if batch:
+        flush(batch)
+        inserted += len(batch)
+        if progress:
+            progress(inserted)
+
+    # シグナルを通らないので、件数キャッシュはここで無効にする
+    counts.invalidate()
+    return inserted
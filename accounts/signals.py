@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import counts
+from .models import CustomUser, users_bulk_updated, users_soft_deleted
+
+
+# ユーザーが保存・削除されたら件数キャッシュを無効にする
+# (詳細ページのキャッシュはキーに更新日時が入っているので無効にしなくてよい)
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_caches(sender, instance, **kwargs):
+    counts.invalidate()
+
+
+# 一括論理削除・一括編集(UPDATE 1回)のときも同じようにキャッシュを無効にする
+@receiver(users_soft_deleted, sender=CustomUser)
+@receiver(users_bulk_updated, sender=CustomUser)
+def invalidate_many_users(sender, pks, **kwargs):
+    counts.invalidate()
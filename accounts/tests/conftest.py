@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import cache, caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """テストごとにキャッシュを空にする"""
+    cache.clear()
+    caches["rows"].clear()
+    yield
+    cache.clear()
+    caches["rows"].clear()
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(settings):
+    """テストでは軽いハッシャーを使う"""
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,114 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from accounts import counts
+from accounts.archive import FileArchive, archive_users, cutoff_for
+from accounts.models import ArchivedUser, CustomUser
+
+
+@pytest.mark.django_db
+class TestArchiveDeletedUsers:
+    @pytest.fixture
+    def create_users(self):
+        """
+        old0〜old4: 400日前に削除
+        recent: 10日前に削除
+        alive: 削除されていない
+        """
+        users = [
+            CustomUser.objects.create(username=name, email=f"{name}@example.com")
+            for name in ["old0", "old1", "old2", "old3", "old4", "recent", "alive"]
+        ]
+        now = timezone.now()
+        CustomUser.objects.filter(username__startswith="old").update(
+            is_deleted=True, updated_at=now - timedelta(days=400)
+        )
+        CustomUser.objects.filter(username="recent").update(
+            is_deleted=True, updated_at=now - timedelta(days=10)
+        )
+        return users
+
+    def run(self, *args):
+        out = io.StringIO()
+        call_command("archive_deleted_users", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_deleted_users_to_table(self, create_users):
+        """古い削除済みユーザーだけが ArchivedUser に移り、物理削除されること"""
+        output = self.run("--days", "365", "--batch-size", "2")
+
+        assert "Archived 5 users in 3 batches" in output
+        assert sorted(
+            CustomUser.all_with_deleted.values_list("username", flat=True)
+        ) == ["alive", "recent"]
+        archived = ArchivedUser.objects.order_by("original_id")
+        assert [a.username for a in archived] == [f"old{i}" for i in range(5)]
+        assert "password" not in archived[0].data
+        assert archived[0].data["email"] == "old0@example.com"
+
+    def test_counts_follow_purge(self, create_users):
+        """物理削除後も件数が正しいこと"""
+        self.run("--days", "365")
+        assert counts.total_count() == 1
+        assert CustomUser.all_with_deleted.count() == 2
+
+    def test_dry_run_changes_nothing(self, create_users):
+        """--dry-run は件数を表示するだけで何も変更しないこと"""
+        output = self.run("--days", "365", "--batch-size", "2", "--dry-run")
+
+        assert "5 users" in output
+        assert "3 batches" in output
+        assert CustomUser.all_with_deleted.count() == 7
+        assert not ArchivedUser.objects.exists()
+
+    def test_jsonl_file(self, create_users, tmp_path):
+        """gzip 圧縮の JSONL に書き出せること(バッチごとの追記も読めること)"""
+        path = tmp_path / "users.jsonl.gz"
+        self.run("--days", "365", "--batch-size", "2", "--file", str(path))
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        assert [r["username"] for r in rows] == [f"old{i}" for i in range(5)]
+        assert not ArchivedUser.objects.exists()
+        assert not CustomUser.all_with_deleted.filter(username="old0").exists()
+        assert not (tmp_path / "users.jsonl.gz.checkpoint").exists()
+
+    def test_csv_file_has_single_header(self, create_users, tmp_path):
+        """CSV はヘッダー1行のあとに全バッチの行が続くこと"""
+        path = tmp_path / "users.csv.gz"
+        self.run("--days", "365", "--batch-size", "2", "--file", str(path))
+
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0][:3] == ["id", "username", "email"]
+        assert [r[1] for r in rows[1:]] == [f"old{i}" for i in range(5)]
+
+    def test_resume_after_interrupted_batch(self, create_users, tmp_path):
+        """書き込み後に止まったバッチは、再開時に二重に書かず削除だけすること"""
+        path = str(tmp_path / "users.jsonl.gz")
+        target = FileArchive(path)
+        old0 = CustomUser.all_with_deleted.get(username="old0")
+        # old0 を書き込んだところで止まった状態を作る
+        target.write([{"id": old0.pk, "username": "old0", "email": old0.email}])
+        target.mark_pending([old0.pk])
+
+        stats = archive_users(cutoff_for(365), target, batch_size=2)
+
+        assert stats.resumed == 1
+        assert stats.archived == 4
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            names = [json.loads(line)["username"] for line in f]
+        assert names == [f"old{i}" for i in range(5)]
+        assert target.pending() == []
+
+    def test_invalid_file_extension(self, create_users):
+        """対応していない拡張子はエラーになること"""
+        with pytest.raises(CommandError):
+            self.run("--file", "users.txt")
@@ -0,0 +1,56 @@
+import csv
+import io
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.fixture
+    def create_users(self):
+        """テスト用ユーザーを作成"""
+        return [
+            CustomUser.objects.create(username="Alice", email="alice@example.com"),
+            CustomUser.objects.create(username="Bob", email="bob@SAMPLE.com"),
+        ]
+
+    def test_user_list_matches_sync_view(self, client, create_users):
+        """非同期版の一覧が同期版と同じ結果になること"""
+        params = {"email": "sample"}
+        sync = client.get(reverse("accounts:user_list"), params)
+        response = client.get(reverse("accounts:async_user_list"), params)
+
+        assert response.status_code == 200
+        assert list(response.context["users"]) == list(sync.context["users"])
+        assert response.context["total_count"] == 1
+
+    def test_user_detail(self, client, create_users):
+        """非同期版の詳細ページが表示され、2回目は304にできること"""
+        url = reverse("accounts:async_user_detail", kwargs={"pk": create_users[0].pk})
+        first = client.get(url)
+        assert first.status_code == 200
+        assert "alice@example.com" in first.content.decode()
+
+        second = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 304
+
+    def test_user_detail_not_found(self, client):
+        """存在しないユーザーは404"""
+        url = reverse("accounts:async_user_detail", kwargs={"pk": 999})
+        assert client.get(url).status_code == 404
+
+    def test_export_streams_csv(self, client, create_users):
+        """非同期ジェネレータで CSV がストリーミングされること"""
+        response = client.get(reverse("accounts:async_export_users_csv"))
+        assert response.status_code == 200
+        assert response.is_async
+
+        async def read():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(read)().decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(body)))
+        assert [r[1] for r in rows[1:]] == ["Bob", "Alice"]
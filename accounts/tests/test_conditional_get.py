@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    @pytest.fixture
+    def user(self):
+        return CustomUser.objects.create(username="alice", email="alice@example.com")
+
+    def revalidate(self, client, url, params=None):
+        """1回目のETagを付けて同じURLを取得し直す"""
+        first = client.get(url, params or {})
+        assert first.status_code == 200
+        return first, client.get(url, params or {}, HTTP_IF_NONE_MATCH=first["ETag"])
+
+    def test_detail_not_modified(self, client, user):
+        """変更がなければ詳細ページは304になること"""
+        url = reverse("accounts:user_detail", kwargs={"pk": user.pk})
+        first, second = self.revalidate(client, url)
+        assert "Last-Modified" in first
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_detail_modified_after_save(self, client, user):
+        """保存後は新しい内容を返すこと"""
+        url = reverse("accounts:user_detail", kwargs={"pk": user.pk})
+        first = client.get(url)
+        user.save()
+        second = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 200
+
+    def test_detail_if_modified_since(self, client, user):
+        """If-Modified-Since でも304になること"""
+        url = reverse("accounts:user_detail", kwargs={"pk": user.pk})
+        first = client.get(url)
+        second = client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert second.status_code == 304
+
+    def test_list_not_modified(self, client, user):
+        """一覧は同じ検索条件・変更なしなら304になること"""
+        url = reverse("accounts:user_list")
+        _, second = self.revalidate(client, url, {"email": "example"})
+        assert second.status_code == 304
+
+    def test_list_modified_after_hard_delete(self, client, user):
+        """行が物理削除された場合も304にならないこと"""
+        other = CustomUser.objects.create(username="bob", email="bob@example.com")
+        url = reverse("accounts:user_list")
+        first = client.get(url)
+        # 最終更新日時が変わらない行を消す
+        CustomUser.objects.filter(pk=user.pk).delete()
+        assert other.updated_at > user.updated_at
+        second = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 200
+
+    def test_list_modified_after_soft_delete(self, client, user):
+        """論理削除されたら ETag が変わり、If-Modified-Since だけでも304にならないこと"""
+        CustomUser.objects.create(username="bob", email="bob@example.com")
+        url = reverse("accounts:export_users_csv")
+        first = client.get(url)
+        assert "Last-Modified" not in first
+        user.delete()
+        second = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 200
+        third = client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        assert third.status_code == 200
+
+    def test_list_etag_depends_on_filter(self, client, user):
+        """検索条件が違えばETagも違うこと"""
+        url = reverse("accounts:user_list")
+        a = client.get(url, {"email": "example"})
+        b = client.get(url, {"email": "alice"})
+        assert a["ETag"] != b["ETag"]
+
+    def test_export_not_modified(self, client, user):
+        """CSVエクスポートも304になること"""
+        url = reverse("accounts:export_users_csv")
+        _, second = self.revalidate(client, url)
+        assert second.status_code == 304
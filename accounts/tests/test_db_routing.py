@@ -0,0 +1,164 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.sessions.models import Session
+from accounts import search
+from accounts.models import CsvJob, CustomUser
+from accounts.routers import PIN_COOKIE, PrimaryReplicaRouter, _state, read_db
+
+
+def user_queries(ctx, table="accounts_customuser"):
+    return [q for q in ctx.captured_queries if table in q["sql"]]
+
+
+# レプリカは default とは別の接続なので、コミットしたデータしか見えない
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaRouting:
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_REPLICAS = ["replica"]
+        settings.REQUEST_METRICS_LOG = False
+
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(3)
+        ]
+
+    def get(self, client, url, **params):
+        """default とレプリカそれぞれで実行されたユーザーのクエリを返す"""
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = client.get(url, params)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+        return response, user_queries(primary), user_queries(replica)
+
+    def test_list_reads_from_replica(self, client, create_users):
+        """一覧の読み込みはレプリカに行くこと"""
+        response, primary, replica = self.get(client, reverse("accounts:user_list"))
+        assert response.status_code == 200
+        assert replica
+        assert not primary
+
+    def test_streaming_export_reads_from_replica(self, client, create_users):
+        """ミドルウェアを抜けた後に読むCSVもレプリカから読むこと"""
+        response, primary, replica = self.get(
+            client, reverse("accounts:export_users_csv")
+        )
+        assert any("SELECT" in q["sql"] for q in replica)
+        assert not primary
+
+    def test_sticky_to_primary_after_write(self, client, create_users):
+        """書き込んだユーザーは、その後の読み込みが default に固定されること"""
+        response = client.post(
+            reverse("accounts:signup"),
+            {
+                "username": "newuser",
+                "email": "new@example.com",
+                "password1": "s3cret-pass",
+                "birthday": "2000-01-01",
+            },
+        )
+        assert response.status_code == 302
+        assert response.cookies[PIN_COOKIE]["max-age"] == 5
+
+        _, primary, replica = self.get(client, reverse("accounts:user_list"))
+        assert primary
+        assert not replica
+
+    def test_other_users_keep_reading_replica(self, client, create_users):
+        """書き込んでいないユーザー(Cookie なし)はレプリカを読むこと"""
+        client.post(
+            reverse("accounts:signup"),
+            {
+                "username": "newuser",
+                "email": "new@example.com",
+                "password1": "s3cret-pass",
+                "birthday": "2000-01-01",
+            },
+        )
+        client.cookies.pop(PIN_COOKIE)
+        _, primary, replica = self.get(client, reverse("accounts:user_list"))
+        assert replica
+        assert not primary
+
+    def test_outside_requests_use_primary(self, create_users):
+        """リクエストの外(ジョブ・コマンドなど)は default を読むこと"""
+        assert read_db() == "default"
+        assert CustomUser.objects.all().db == "default"
+
+    def test_writes_always_go_to_primary(self, create_users):
+        """レプリカから読んだインスタンスも default に書き込むこと"""
+        router = PrimaryReplicaRouter()
+        user = CustomUser.objects.using("replica").get(username="user0")
+        assert router.db_for_write(CustomUser, instance=user) == "default"
+        assert router.allow_migrate("replica", "accounts") is False
+        assert router.allow_migrate("default", "accounts") is None
+
+    def test_disabled_without_replicas(self, client, create_users, settings):
+        """DATABASE_REPLICAS が空なら全て default を読むこと"""
+        settings.DATABASE_REPLICAS = []
+        _, primary, replica = self.get(client, reverse("accounts:user_list"))
+        assert primary
+        assert not replica
+
+    def test_only_users_are_routed(self, create_users):
+        """レプリカに振り分けるのはユーザーだけで、セッション・ジョブは default"""
+        router = PrimaryReplicaRouter()
+        token = _state.set(type("State", (), {"replica_reads": True})())
+        try:
+            assert router.db_for_read(CustomUser) == "replica"
+            assert router.db_for_read(Session) == "default"
+            assert router.db_for_read(CsvJob) == "default"
+        finally:
+            _state.reset(token)
+
+    def test_job_status_reads_primary(self, client, create_users):
+        """作ったばかりのジョブの状態は、Cookie がなくても default から読むこと"""
+        job = CsvJob.objects.create(kind=CsvJob.KIND_EXPORT)
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = client.get(reverse("accounts:job_status", kwargs={"pk": job.pk}))
+        assert response.status_code == 200
+        assert not user_queries(replica, "accounts_csvjob")
+
+    def test_background_export_after_write_reads_primary(self, client, settings):
+        """書き込んだ直後のユーザーが登録したエクスポートは default から読むこと"""
+        settings.CSV_JOBS_EAGER = True
+        client.cookies[PIN_COOKIE] = "1"
+        response = client.get(reverse("accounts:export_users_csv"), {"background": 1})
+        job = CsvJob.objects.get(pk=response.json()["id"])
+        assert job.params["database"] == "default"
+
+        client.cookies.pop(PIN_COOKIE)
+        response = client.get(reverse("accounts:export_users_csv"), {"background": 1})
+        job = CsvJob.objects.get(pk=response.json()["id"])
+        assert job.params["database"] == "replica"
+
+    def test_async_search_reads_replica(self, async_client, create_users, monkeypatch):
+        """非同期版の一覧・エクスポートでもレプリカで検索できること"""
+        monkeypatch.setattr(search, "_available", {})
+
+        async def get(url):
+            response = await async_client.get(url, {"username": "user1"})
+            if response.streaming:
+                return response, b"".join(
+                    [chunk async for chunk in response.streaming_content]
+                )
+            return response, response.content
+
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response, _ = async_to_sync(get)(reverse("accounts:async_user_list"))
+                assert response.status_code == 200
+                assert [u.username for u in response.context["users"]] == ["user1"]
+                response, body = async_to_sync(get)(
+                    reverse("accounts:async_export_users_csv")
+                )
+                assert response.status_code == 200
+                assert b"user1" in body and b"user0" not in body
+        assert user_queries(replica)
+        assert not user_queries(primary)
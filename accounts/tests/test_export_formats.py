@@ -0,0 +1,102 @@
+import gzip
+import io
+
+import pytest
+from django.urls import reverse
+from accounts import export_formats
+from accounts.exporter import EXPORT_FIELDS
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestExportFormats:
+
+    url = reverse("accounts:export_users_csv")
+
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(5)
+        ]
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_gzip_matches_csv(self, client, create_users):
+        """csv.gz を展開すると csv と同じ内容になること"""
+        plain = self.body(client.get(self.url))
+        response = client.get(self.url, {"format": "csv.gz"})
+
+        assert response["Content-Type"] == "application/gzip"
+        assert response["Content-Disposition"] == 'attachment; filename="users.csv.gz"'
+        assert gzip.decompress(self.body(response)) == plain
+
+    def test_format_from_accept_header(self, client, create_users):
+        """format= がなければ Accept ヘッダーで選ぶこと"""
+        response = client.get(self.url, HTTP_ACCEPT="application/gzip")
+        assert response["Content-Type"] == "application/gzip"
+        assert "Accept" in response["Vary"]
+
+        # ブラウザのリンク(text/html, */*)はこれまでどおり CSV
+        response = client.get(self.url, HTTP_ACCEPT="text/html,*/*;q=0.8")
+        assert response["Content-Type"] == "text/csv"
+
+    def test_unknown_format(self, client, create_users):
+        """選べない形式は 400 を返すこと"""
+        assert client.get(self.url, {"format": "xlsx"}).status_code == 400
+
+    def test_background_only_csv(self, client, create_users, settings):
+        """バックグラウンドのジョブは CSV だけで、ほかの形式は 400 を返すこと"""
+        settings.CSV_JOBS_EAGER = True
+        for params, accept in (
+            ({"format": "csv.gz"}, "*/*"),
+            ({"format": "xlsx"}, "*/*"),
+            ({}, "application/gzip"),
+        ):
+            response = client.get(
+                self.url, {"background": "1", **params}, HTTP_ACCEPT=accept
+            )
+            assert response.status_code == 400
+            assert response.content.decode() == "format は csv のいずれかです"
+        response = client.get(self.url, {"background": "1", "format": "csv"})
+        assert response.status_code == 202
+
+    def test_columnar_requires_pyarrow(self, client, create_users, monkeypatch):
+        """pyarrow がなければ列指向の形式は選べないこと"""
+        monkeypatch.setattr(export_formats, "pyarrow", None)
+        assert client.get(self.url, {"format": "parquet"}).status_code == 400
+        assert export_formats.available_formats() == ["csv", "csv.gz"]
+
+    def test_incremental_gzip(self, client, create_users, settings):
+        """差分エクスポートでも形式を選べ、トークンを返すこと"""
+        settings.USER_INCREMENTAL_EXPORT_LAG_SECONDS = 0
+        response = client.get(self.url, {"since": "", "format": "csv.gz"})
+        assert response["X-Next-Since"]
+        text = gzip.decompress(self.body(response)).decode("utf-8")
+        assert text.splitlines()[0].endswith("削除フラグ")
+        assert len(text.splitlines()) == 6
+
+    @pytest.mark.parametrize("name", ["parquet", "arrow"])
+    def test_columnar(self, client, create_users, settings, name):
+        """Parquet / Arrow で全行・全列を型付きで読めること"""
+        pyarrow = pytest.importorskip("pyarrow")
+        settings.CSV_EXPORT_COLUMNAR_BATCH_SIZE = 2
+        response = client.get(self.url, {"format": name})
+        data = io.BytesIO(self.body(response))
+        if name == "parquet":
+            import pyarrow.parquet
+
+            table = pyarrow.parquet.read_table(data)
+        else:
+            import pyarrow.ipc
+
+            table = pyarrow.ipc.open_stream(data).read_all()
+
+        assert table.column_names == list(EXPORT_FIELDS)
+        assert table.num_rows == 5
+        created_at = table.schema.field("created_at")
+        assert created_at.type == pyarrow.timestamp("us", tz="UTC")
+        assert sorted(table.column("username").to_pylist()) == [
+            u.username for u in create_users
+        ]
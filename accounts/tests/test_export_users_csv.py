@@ -0,0 +1,49 @@
+import csv
+import io
+
+import pytest
+from django.urls import reverse
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestExportUsersCsv:
+
+    url = reverse("accounts:export_users_csv")
+
+    @pytest.fixture
+    def create_users(self):
+        """テスト用ユーザーを作成"""
+        return [
+            CustomUser.objects.create(username="Alice", email="alice@example.com"),
+            CustomUser.objects.create(username="Bob", email="bob@sample.com"),
+        ]
+
+    def _read(self, response):
+        body = b"".join(response.streaming_content).decode("utf-8")
+        return body, list(csv.reader(io.StringIO(body)))
+
+    def test_export_streams_with_bom_and_header(self, client, create_users):
+        """BOM・ヘッダー付きでストリーミングされること"""
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Disposition"] == 'attachment; filename="users.csv"'
+
+        body, rows = self._read(response)
+        assert body.startswith("﻿")
+        assert rows[0][0] == "﻿ID"
+        assert len(rows) == 3
+
+    def test_export_rows_include_id(self, client, create_users):
+        """データ行の先頭にIDが出力されること(新しい順)"""
+        _, rows = self._read(client.get(self.url))
+        bob, alice = rows[1], rows[2]
+        assert bob[:3] == [str(create_users[1].pk), "Bob", "bob@sample.com"]
+        assert alice[:3] == [str(create_users[0].pk), "Alice", "alice@example.com"]
+        assert len(bob) == len(rows[0])
+
+    def test_export_filter(self, client, create_users):
+        """検索条件で絞り込めること"""
+        _, rows = self._read(client.get(self.url, {"email": "sample"}))
+        assert [r[1] for r in rows[1:]] == ["Bob"]
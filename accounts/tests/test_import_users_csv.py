@@ -0,0 +1,80 @@
+import csv
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from accounts.importer import InvalidHeader, import_users
+from accounts.models import CustomUser
+
+
+def make_csv(rows, headers=("Username", "Email")):
+    f = io.StringIO()
+    writer = csv.writer(f)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return f.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+    def test_import_users_in_batches(self):
+        """バッチをまたいでも全件登録されること"""
+        rows = [(f"user{i}", f"user{i}@example.com") for i in range(25)]
+        result = import_users(io.StringIO(make_csv(rows)), batch_size=10)
+
+        assert result.success_count == 25
+        assert result.errors == []
+        assert CustomUser.objects.count() == 25
+
+    def test_import_users_collects_errors(self):
+        """不正行・重複行がエラーとして記録されること"""
+        CustomUser.objects.create(username="alice", email="alice@example.com")
+        rows = [
+            ("alice", "other@example.com"),  # 既存ユーザー名
+            ("bob", "alice@example.com"),  # 既存メールアドレス
+            ("carol", "not-an-email"),  # メール形式不正
+            ("", "empty@example.com"),  # 必須項目なし
+            ("dave", "dave@example.com"),
+            ("dave", "dave2@example.com"),  # ファイル内重複
+        ]
+        result = import_users(io.StringIO(make_csv(rows)), batch_size=2)
+
+        assert result.success_count == 1
+        assert result.skipped_count == 2
+        assert result.error_count == 3
+        assert [e[0] for e in result.errors] == [2, 3, 4, 5, 7]
+        assert CustomUser.objects.filter(username="dave").count() == 1
+
+    def test_import_users_invalid_header(self):
+        """ヘッダーが違う場合は InvalidHeader"""
+        with pytest.raises(InvalidHeader):
+            import_users(io.StringIO(make_csv([], headers=("name", "mail"))))
+
+    def test_import_view_runs_job_with_error_report(self, client, settings, tmp_path):
+        """エラー行はメッセージではなくジョブのレポートとしてダウンロードできること"""
+        settings.MEDIA_ROOT = tmp_path
+        settings.CSV_JOBS_EAGER = True
+        content = make_csv([("erin", "erin@example.com"), ("frank", "bad")])
+        upload = SimpleUploadedFile(
+            "users.csv", content.encode("utf-8"), content_type="text/csv"
+        )
+        response = client.post(
+            reverse("accounts:import_users_csv"), {"csv_file": upload}
+        )
+
+        assert response.status_code == 302
+        assert CustomUser.objects.filter(username="erin").exists()
+
+        job_id = client.session["import_job"]
+        status = client.get(reverse("accounts:job_status", kwargs={"pk": job_id}))
+        data = status.json()
+        assert data["status"] == "done"
+        assert data["success_count"] == 1
+        assert data["error_count"] == 1
+
+        report = client.get(data["download_url"])
+        assert report.status_code == 200
+        body = b"".join(report.streaming_content).decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(body)))
+        assert rows[1][:3] == ["3", "frank", "bad"]
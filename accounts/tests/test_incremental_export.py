@@ -0,0 +1,78 @@
+import csv
+import io
+
+import pytest
+from django.urls import reverse
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestIncrementalExport:
+
+    url = reverse("accounts:export_users_csv")
+
+    @pytest.fixture(autouse=True)
+    def no_lag(self, settings):
+        settings.USER_INCREMENTAL_EXPORT_LAG_SECONDS = 0
+
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(3)
+        ]
+
+    def export(self, client, since, **params):
+        response = client.get(self.url, {"since": since, **params})
+        assert response.status_code == 200
+        body = b"".join(response.streaming_content).decode("utf-8")
+        rows = list(csv.reader(io.StringIO(body)))
+        return rows[0], rows[1:], response["X-Next-Since"]
+
+    def test_first_run_exports_all(self, client, create_users):
+        """since が空なら全件を古い順に出力し、トークンを返すこと"""
+        header, rows, token = self.export(client, "")
+        assert header[-1] == "削除フラグ"
+        assert [r[1] for r in rows] == ["user0", "user1", "user2"]
+        assert token
+
+    def test_only_changes_after_token(self, client, create_users):
+        """トークンより後の作成・更新・論理削除だけを出力すること"""
+        _, _, token = self.export(client, "")
+
+        create_users[0].email = "changed@example.com"
+        create_users[0].save()
+        create_users[1].delete()
+        CustomUser.objects.create(username="new", email="new@example.com")
+
+        _, rows, next_token = self.export(client, token)
+        assert [(r[1], r[2], r[-1]) for r in rows] == [
+            ("user0", "changed@example.com", "False"),
+            ("user1", "user1@example.com", "True"),
+            ("new", "new@example.com", "False"),
+        ]
+
+        _, rows, last_token = self.export(client, next_token)
+        assert rows == []
+        assert last_token == next_token
+
+    def test_recent_changes_wait_for_next_run(self, client, create_users, settings):
+        """直近 LAG 秒の変更は次回に回すこと"""
+        settings.USER_INCREMENTAL_EXPORT_LAG_SECONDS = 60
+        _, rows, token = self.export(client, "")
+        assert rows == []
+        assert token == ""
+
+    def test_not_conditional(self, client, create_users):
+        """同じトークンでも ETag を付けない(LAG を過ぎると結果が変わるため)"""
+        response = client.get(self.url, {"since": ""})
+        assert not response.has_header("ETag")
+
+    def test_invalid_token(self, client, create_users):
+        """壊れたトークンは 400 を返すこと"""
+        assert client.get(self.url, {"since": "broken"}).status_code == 400
+
+    def test_background_rejected(self, client, create_users):
+        """バックグラウンドのジョブでは差分エクスポートできないので 400 を返すこと"""
+        response = client.get(self.url, {"since": "", "background": "1"})
+        assert response.status_code == 400
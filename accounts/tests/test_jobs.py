@@ -0,0 +1,72 @@
+import csv
+import io
+import time
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from accounts import jobs
+from accounts.models import CsvJob, CustomUser
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def wait_for(job, timeout=10):
+    """ジョブが終わるまで待つ"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job.refresh_from_db()
+        if job.status in (CsvJob.STATUS_DONE, CsvJob.STATUS_FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job.pk} did not finish")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCsvJobs:
+    def test_export_returns_job_id_immediately(self, client, media):
+        """background=1 のエクスポートはジョブIDを返し、別スレッドで完了すること"""
+        CustomUser.objects.create(username="alice", email="alice@example.com")
+        CustomUser.objects.create(username="bob", email="bob@example.com")
+
+        response = client.get(
+            reverse("accounts:export_users_csv"), {"background": "1", "email": "bob"}
+        )
+        assert response.status_code == 202
+        job = wait_for(CsvJob.objects.get(pk=response.json()["id"]))
+        assert job.status == CsvJob.STATUS_DONE
+        assert job.processed == 1
+
+        download = client.get(reverse("accounts:job_download", kwargs={"pk": job.pk}))
+        body = b"".join(download.streaming_content).decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(body)))
+        assert [r[1] for r in rows[1:]] == ["bob"]
+
+    def test_import_job_runs_in_thread(self, media):
+        """インポートジョブが別スレッドで実行されること"""
+        upload = SimpleUploadedFile(
+            "users.csv", b"Username,Email\r\ncarol,carol@example.com\r\n"
+        )
+        job = wait_for(jobs.submit_import(upload))
+
+        assert job.status == CsvJob.STATUS_DONE
+        assert job.success_count == 1
+        assert CustomUser.objects.filter(username="carol").exists()
+
+    def test_import_job_invalid_header_fails(self, media):
+        """ヘッダーが不正な場合はジョブが失敗になること"""
+        upload = SimpleUploadedFile("users.csv", b"name,mail\r\nx,y\r\n")
+        job = wait_for(jobs.submit_import(upload))
+
+        assert job.status == CsvJob.STATUS_FAILED
+        assert job.message == "CSVヘッダーが正しくありません。"
+
+    def test_download_before_done_is_404(self, client):
+        """完了前のジョブはダウンロードできないこと"""
+        job = CsvJob.objects.create(kind=CsvJob.KIND_EXPORT)
+        response = client.get(reverse("accounts:job_download", kwargs={"pk": job.pk}))
+        assert response.status_code == 404
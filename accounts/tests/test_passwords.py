@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.urls import reverse
+from accounts import passwords
+from accounts.models import CustomUser
+
+
+@pytest.fixture
+def tuned_hashers(settings):
+    settings.PASSWORD_HASHERS = [
+        "accounts.hashers.ScryptPasswordHasher",
+        "accounts.hashers.PBKDF2PasswordHasher",
+    ]
+    settings.PASSWORD_HASHER_PARAMS = {
+        "scrypt": {"work_factor": 2**10, "block_size": 8, "parallelism": 1},
+        "pbkdf2": {"iterations": 1000},
+    }
+
+
+class TestHashers:
+    def test_params_from_settings(self, tuned_hashers):
+        """設定したパラメータでハッシュ化されること"""
+        encoded = passwords.hash_password("s3cret-pass")
+        assert encoded.startswith("scrypt$1024$")
+        assert check_password("s3cret-pass", encoded)
+
+    def test_hash_password_runs_in_pool(self, tuned_hashers):
+        """ハッシュ化がスレッドプールで行われること"""
+        future = passwords._submit(lambda: threading.current_thread().name)
+        assert future.result().startswith("password-hash")
+
+
+@pytest.mark.django_db
+class TestSignupHashing:
+    def test_signup_stores_hashed_password(self, client, tuned_hashers):
+        """新規登録で先頭のハッシャーのハッシュが保存されること"""
+        response = client.post(
+            reverse("accounts:signup"),
+            {
+                "username": "alice",
+                "email": "alice@example.com",
+                "password1": "s3cret-pass",
+                "birthday": "2000-01-01",
+            },
+        )
+        assert response.status_code == 302
+        user = CustomUser.objects.get(username="alice")
+        assert identify_hasher(user.password).algorithm == "scrypt"
+        assert user.check_password("s3cret-pass")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRehashOnLogin:
+    @pytest.fixture
+    def old_user(self, tuned_hashers):
+        """古いハッシャーのパスワードを持つユーザー"""
+        user = CustomUser.objects.create(username="bob", email="bob@example.com")
+        old = make_password("s3cret-pass", hasher="pbkdf2_sha256")
+        CustomUser.objects.filter(pk=user.pk).update(password=old)
+        user.refresh_from_db()
+        return user
+
+    @pytest.fixture
+    def hash_threads(self, monkeypatch):
+        """再ハッシュを実行したスレッドの名前"""
+        threads = []
+        original = passwords.make_password
+
+        def spy(raw_password):
+            threads.append(threading.current_thread().name)
+            return original(raw_password)
+
+        monkeypatch.setattr(passwords, "make_password", spy)
+        return threads
+
+    def test_rehash_runs_in_pool(self, old_user, hash_threads):
+        """古いハッシュはログイン時にスレッドプールで再ハッシュされ、保存されること"""
+        assert old_user.check_password("s3cret-pass")
+        assert len(hash_threads) == 1
+        assert hash_threads[0].startswith("password-hash")
+        assert identify_hasher(old_user.password).algorithm == "scrypt"
+
+        old_user.refresh_from_db()
+        assert identify_hasher(old_user.password).algorithm == "scrypt"
+        assert old_user.check_password("s3cret-pass")
+
+    def test_async_rehash_runs_in_pool(self, old_user, hash_threads):
+        """非同期版の acheck_password でもスレッドプールで再ハッシュされること"""
+        assert async_to_sync(old_user.acheck_password)("s3cret-pass")
+        assert hash_threads[0].startswith("password-hash")
+
+        old_user.refresh_from_db()
+        assert identify_hasher(old_user.password).algorithm == "scrypt"
+
+    def test_session_survives_rehash(self, client, old_user):
+        """再ハッシュされたログインの後も、次のリクエストでログインしたままであること"""
+        assert client.login(username="bob", password="s3cret-pass")
+        old_user.refresh_from_db()
+        assert identify_hasher(old_user.password).algorithm == "scrypt"
+
+        response = client.get(reverse("accounts:user_list"))
+        assert response.wsgi_request.user.is_authenticated
@@ -0,0 +1,102 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from accounts.api import stream_ndjson
+from accounts.exporter import changed_since, encode_since
+from accounts.filters import filter_params, filter_users
+from accounts.models import CustomUser
+from accounts.pagination import KeysetPaginator
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="SQLite の実行計画を確認するテスト"
+)
+
+LIST_ORDER = ("-updated_at", "-created_at", "-id")
+
+
+def assert_index_backed(queryset):
+    """フルスキャン・並べ替え用の一時B-tree(一部の列だけでも)が実行計画に出ないこと"""
+    plan = queryset.explain()
+    for line in plan.splitlines():
+        if "SCAN accounts_customuser" in line:
+            assert "USING" in line and "INDEX" in line, plan
+    assert "USE TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    since = timezone.make_aware(datetime.datetime(2024, 1, 1))
+
+    def test_user_list_first_page(self):
+        """一覧の先頭ページはインデックス順に読むだけであること"""
+        assert_index_backed(CustomUser.objects.order_by(*LIST_ORDER)[:51])
+
+    def test_user_list_updated_range(self):
+        """更新日時の範囲検索がインデックスで絞り込まれること"""
+        qs = CustomUser.objects.filter(updated_at__gte=self.since)
+        assert_index_backed(qs.order_by(*LIST_ORDER)[:51])
+
+    def test_user_list_created_range(self):
+        """作成日時の範囲検索がフルスキャンにならないこと"""
+        params = filter_params({"created_from": "2024-01-01"})
+        plan = filter_users(params).order_by(*LIST_ORDER)[:51].explain()
+        assert "SEARCH accounts_customuser USING INDEX" in plan, plan
+        assert_index_backed(filter_users(params).order_by(*LIST_ORDER)[:51])
+
+    def test_user_list_cursor_seeks(self):
+        """次・前のページはカーソルの位置までインデックスで飛ぶこと(先頭から読まない)"""
+        for i in range(3):
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+        paginator = KeysetPaginator(CustomUser.objects.all(), 1)
+        next_cursor = paginator.page().next_cursor
+        previous_cursor = paginator.page(next_cursor).previous_cursor
+        for cursor in (next_cursor, previous_cursor):
+            qs, _ = paginator._query(cursor)
+            plan = qs.explain()
+            assert "SEARCH accounts_customuser USING INDEX" in plan, plan
+            assert "SCAN accounts_customuser" not in plan, plan
+
+    def test_ndjson_stream_pages_seek(self, monkeypatch):
+        """NDJSON の2ページ目以降も、前のページの続きからインデックスで読むこと"""
+        for i in range(3):
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+        paginator = KeysetPaginator(
+            CustomUser.objects.values("id", *KeysetPaginator.fields), 1
+        )
+        queries = []
+        query = paginator._query
+
+        def spy(cursor):
+            qs, reverse = query(cursor)
+            queries.append((cursor, qs))
+            return qs, reverse
+
+        monkeypatch.setattr(paginator, "_query", spy)
+        assert len(list(stream_ndjson(paginator, ("id",)))) == 3
+        for cursor, qs in queries:
+            assert_index_backed(qs)
+            if cursor:
+                assert "SEARCH accounts_customuser USING INDEX" in qs.explain()
+
+    def test_export_query(self):
+        """CSVエクスポートの全件取得がインデックス順であること"""
+        params = filter_params({})
+        assert_index_backed(filter_users(params))
+
+    def test_export_updated_range(self):
+        """CSVエクスポートの更新日時範囲検索がインデックスを使うこと"""
+        params = filter_params({"updated_from": "2024-01-01"})
+        assert_index_backed(filter_users(params))
+
+    def test_incremental_export(self, settings):
+        """差分エクスポートは位置より後ろだけをインデックスで読むこと"""
+        settings.USER_INCREMENTAL_EXPORT_LAG_SECONDS = 0
+        CustomUser.objects.create(username="alice", email="alice@example.com")
+        users, _ = changed_since(
+            CustomUser.all_with_deleted.all(), encode_since(self.since, 1)
+        )
+        plan = users.explain()
+        assert "SEARCH accounts_customuser USING INDEX" in plan, plan
+        assert "SCAN accounts_customuser" not in plan, plan
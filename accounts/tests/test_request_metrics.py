@@ -0,0 +1,107 @@
+import json
+import logging
+import tracemalloc
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.template.loader import render_to_string
+from django.urls import reverse
+from accounts.metrics import track
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(3)
+        ]
+
+    @pytest.fixture
+    def metrics_settings(self, settings):
+        settings.REQUEST_METRICS_ENABLED = True
+        settings.REQUEST_METRICS_HEADERS = True
+        settings.REQUEST_METRICS_LOG = True
+        settings.REQUEST_METRICS_SLOW_QUERY_MS = None
+        return settings
+
+    def test_track_counts_queries_and_templates(self, create_users):
+        """track() でSQL件数とテンプレート描画時間が取れること"""
+        with track() as m:
+            list(CustomUser.objects.all())
+            CustomUser.objects.count()
+            render_to_string("accounts/user_list.html", {"users": create_users})
+
+        assert m.queries == 2
+        assert m.query_seconds > 0
+        assert m.template_seconds > 0
+        assert m.seconds >= m.query_seconds
+
+    def test_nested_track(self, create_users):
+        """入れ子の計測は内側の分が外側にも数えられること"""
+        with track() as outer:
+            CustomUser.objects.count()
+            with track() as inner:
+                CustomUser.objects.count()
+        assert (outer.queries, inner.queries) == (2, 1)
+
+    def test_headers_and_log_line(self, client, create_users, metrics_settings, caplog):
+        """ヘッダーとJSONのログ行が出ること"""
+        with caplog.at_level(logging.INFO, logger="accounts.metrics"):
+            response = client.get(reverse("accounts:user_list"))
+
+        queries = int(response["X-Query-Count"])
+        assert queries > 0
+        assert "db;dur=" in response["Server-Timing"]
+        assert "tpl;dur=" in response["Server-Timing"]
+
+        line = next(r for r in caplog.records if r.name == "accounts.metrics")
+        data = json.loads(line.getMessage().split(" ", 1)[1])
+        assert data["path"] == reverse("accounts:user_list")
+        assert data["status"] == 200
+        assert data["queries"] == queries
+        # tracemalloc を使わないときはメモリを出さない(プロセス全体の値になるため)
+        assert "X-Peak-Memory-Kb" not in response
+        assert "peak_memory_kb" not in data
+
+    def test_peak_memory_with_tracemalloc(self, client, create_users, metrics_settings):
+        """REQUEST_METRICS_TRACEMALLOC のときはリクエスト中のメモリのピークが出ること"""
+        metrics_settings.REQUEST_METRICS_TRACEMALLOC = True
+        try:
+            response = client.get(reverse("accounts:user_list"))
+        finally:
+            tracemalloc.stop()
+        assert int(response["X-Peak-Memory-Kb"]) > 0
+
+    def test_list_query_count_does_not_grow_with_rows(
+        self, client, create_users, metrics_settings
+    ):
+        """一覧のSQL件数が行数に比例しないこと(N+1 の検出)"""
+        url = reverse("accounts:user_list")
+        before = int(client.get(url)["X-Query-Count"])
+        for i in range(3, 10):
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+        assert int(client.get(url)["X-Query-Count"]) == before
+
+    def test_slow_query_log(self, client, create_users, metrics_settings, caplog):
+        """しきい値を超えたSQLがログに出ること"""
+        metrics_settings.REQUEST_METRICS_SLOW_QUERY_MS = 0
+        with caplog.at_level(logging.WARNING, logger="accounts.metrics.slow_query"):
+            client.get(reverse("accounts:user_list"))
+        assert any(r.name == "accounts.metrics.slow_query" for r in caplog.records)
+
+    def test_async_view_counts_queries(
+        self, async_client, create_users, metrics_settings
+    ):
+        """非同期ビューでも sync_to_async 先のSQLが数えられること"""
+        response = async_to_sync(async_client.get)(reverse("accounts:async_user_list"))
+        assert int(response["X-Query-Count"]) > 0
+
+    def test_disabled(self, client, create_users, settings):
+        """無効にするとヘッダーが付かないこと"""
+        settings.REQUEST_METRICS_ENABLED = False
+        settings.REQUEST_METRICS_HEADERS = True
+        response = client.get(reverse("accounts:user_list"))
+        assert "X-Query-Count" not in response
@@ -0,0 +1,68 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from accounts import counts
+from accounts.filters import filter_users
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestSeedUsers:
+    def run(self, *args):
+        out = io.StringIO()
+        call_command("seed_users", *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_users_with_spread_dates(self):
+        """指定件数を作り、日時・誕生日・削除フラグが散らばること"""
+        output = self.run("500", "--batch-size", "200", "--deleted-fraction", "0.2")
+
+        assert "Created 500 users" in output
+        users = CustomUser.all_with_deleted.all()
+        assert users.count() == 500
+        assert len(set(users.values_list("created_at", flat=True))) == 500
+        assert len(set(users.values_list("birthday", flat=True))) > 100
+        deleted = users.filter(is_deleted=True).count()
+        assert 50 < deleted < 150
+        assert not users.filter(is_deleted=True, is_active=True).exists()
+        assert not users.filter(is_deleted=False, is_active=False).exists()
+        for user in users[:20]:
+            assert user.updated_at >= user.created_at
+            assert user.check_password("seed-password")
+
+    def test_counts_and_search_index_follow(self):
+        """トリガーを外している間の分も、件数と検索インデックスに反映されること"""
+        self.run("300", "--batch-size", "100")
+
+        alive = CustomUser.objects.count()
+        assert counts.total_count() == alive
+        assert filter_users({"username": "user00001"}).count() == (
+            CustomUser.objects.filter(username__contains="user00001").count()
+        )
+
+        # バッチのあとはトリガーが元に戻っていること
+        CustomUser.objects.create(username="after", email="after@example.com")
+        assert filter_users({"username": "after"}).count() == 1
+
+    def test_second_run_continues_numbering(self):
+        """2回目は既存ユーザーと重ならない連番で作ること"""
+        self.run("100")
+        self.run("100")
+        assert CustomUser.all_with_deleted.count() == 200
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSeedUsersDeferIndexes:
+    # SQLite の schema_editor はトランザクション内で使えない
+    def test_defer_indexes_restores_indexes(self):
+        """--defer-indexes のあとも索引が残っていること"""
+        call_command("seed_users", "100", "--defer-indexes", stdout=io.StringIO())
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, CustomUser._meta.db_table
+            )
+        for index in CustomUser._meta.indexes:
+            assert index.name in constraints
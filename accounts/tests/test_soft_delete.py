@@ -0,0 +1,131 @@
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts import counts
+from accounts.admin import CustomUserAdmin
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestBulkSoftDelete:
+    @pytest.fixture
+    def create_users(self):
+        """テスト用ユーザーを作成"""
+        return [
+            CustomUser.objects.create(
+                username=f"user{i}", email=f"user{i}@example.com"
+            )
+            for i in range(5)
+        ]
+
+    def test_soft_delete_single_update(self, create_users):
+        """まとめて1回の UPDATE で論理削除されること"""
+        before = {u.pk: u.updated_at for u in create_users}
+        with CaptureQueriesContext(connection) as ctx:
+            users = CustomUser.objects.filter(username__in=["user1", "user2"])
+            count = users.soft_delete()
+
+        assert count == 2
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+
+        deleted = CustomUser.all_with_deleted.filter(is_deleted=True)
+        assert sorted(u.username for u in deleted) == ["user1", "user2"]
+        for u in deleted:
+            assert u.is_active is False
+            assert u.updated_at > before[u.pk]
+
+    def test_soft_delete_skips_deleted_rows(self, create_users):
+        """削除済みの行は更新しないこと"""
+        create_users[0].delete()
+        assert CustomUser.objects.all().soft_delete() == 4
+
+    def test_soft_delete_invalidates_caches(self, client, create_users):
+        """詳細ページ・件数のキャッシュが無効になること"""
+        user = create_users[0]
+        url = reverse("accounts:user_detail", kwargs={"pk": user.pk})
+        client.get(url)
+        params = {"email": "example"}
+        counts.count_users(params, CustomUser.objects.filter(email__contains="example"))
+        assert cache.get(counts.cache_key(params)) == 5
+
+        CustomUser.objects.filter(pk=user.pk).soft_delete()
+
+        response = client.get(url)
+        assert "<strong>削除済み:</strong> はい" in response.content.decode()
+        assert cache.get(counts.cache_key(params)) is None
+
+    def test_admin_delete_queryset(self, rf, create_users):
+        """管理画面の一括削除が論理削除になること"""
+        admin = CustomUserAdmin(CustomUser, AdminSite())
+        admin.delete_queryset(rf.post("/"), CustomUser.objects.all())
+
+        assert CustomUser.all_with_deleted.count() == 5
+        assert CustomUser.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestAliveManager:
+    @pytest.fixture
+    def users(self):
+        alive = CustomUser.objects.create(username="alive", email="a@example.com")
+        deleted = CustomUser.objects.create(username="gone", email="g@example.com")
+        deleted.delete()
+        return alive, deleted
+
+    def test_objects_excludes_deleted(self, users):
+        """objects は削除済みを含まず、all_with_deleted は含むこと"""
+        assert list(CustomUser.objects.values_list("username", flat=True)) == [
+            "alive"
+        ]
+        assert CustomUser.all_with_deleted.count() == 2
+
+    def test_list_and_export_exclude_deleted(self, client, users):
+        """一覧・CSVエクスポートに削除済みユーザーが出ないこと"""
+        response = client.get(reverse("accounts:user_list"))
+        assert [u.username for u in response.context["users"]] == ["alive"]
+        assert response.context["total_count"] == 1
+
+        export = client.get(reverse("accounts:export_users_csv"))
+        body = b"".join(export.streaming_content).decode("utf-8-sig")
+        assert "alive" in body
+        assert "gone" not in body
+
+    def test_deleted_user_detail_still_visible(self, client, users):
+        """削除済みユーザーの詳細ページは表示できること"""
+        url = reverse("accounts:user_detail", kwargs={"pk": users[1].pk})
+        assert client.get(url).status_code == 200
+
+    def test_username_stays_unique_with_deleted(self, client, users):
+        """削除済みユーザーと同じユーザー名では登録できないこと"""
+        response = client.post(
+            reverse("accounts:signup"),
+            {
+                "username": "gone",
+                "email": "new@example.com",
+                "password1": "s3cret-pass",
+                "birthday": "2000-01-01",
+            },
+        )
+        assert response.status_code == 200
+        assert "username" in response.context["form"].errors
+
+    def test_admin_hides_deleted_by_default(self, admin_client, users):
+        """管理画面の一覧は既定で削除済みを表示しないこと"""
+        url = reverse("admin:accounts_customuser_changelist")
+        names = [u.username for u in admin_client.get(url).context["cl"].result_list]
+        assert "gone" not in names
+        deleted = admin_client.get(url, {"deleted": "yes"}).context["cl"].result_list
+        assert [u.username for u in deleted] == ["gone"]
+
+    def test_admin_deleted_filter_labels(self, admin_client, users):
+        """削除状態の絞り込みの既定が「削除されていない」と表示されること"""
+        url = reverse("admin:accounts_customuser_changelist")
+        cl = admin_client.get(url).context["cl"]
+        deleted_filter = cl.filter_specs[0]
+        choices = list(deleted_filter.choices(cl))
+        assert [c["display"] for c in choices] == ["削除されていない", "削除済み", "すべて"]
+        assert choices[0]["selected"]
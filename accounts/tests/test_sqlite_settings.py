@@ -0,0 +1,38 @@
+import pytest
+from django.conf import settings
+from django.db import connection, connections
+
+
+def pragma(conn, name):
+    with conn.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestSqliteSettings:
+    def test_pragmas_applied(self):
+        """接続ごとに SQLITE_PRAGMAS が実行されていること"""
+        assert pragma(connection, "synchronous") == 1  # NORMAL
+        for name in ("busy_timeout", "cache_size"):
+            assert pragma(connection, name) == settings.SQLITE_PRAGMAS[name]
+
+    def test_transactions_take_write_lock(self):
+        """transaction.atomic() が BEGIN IMMEDIATE になること"""
+        assert connection.transaction_mode == "IMMEDIATE"
+
+    def test_file_database_uses_wal(self, tmp_path):
+        """ファイルのDBでは WAL になること"""
+        settings_dict = dict(
+            connection.settings_dict, NAME=str(tmp_path / "db.sqlite3")
+        )
+        wrapper = connections["default"].__class__(settings_dict)
+        try:
+            assert pragma(wrapper, "journal_mode") == "wal"
+        finally:
+            wrapper.close()
+
+    def test_persistent_connections(self):
+        """接続を使い回し、使い回す前に確認すること"""
+        assert connection.settings_dict["CONN_MAX_AGE"] > 0
+        assert connection.settings_dict["CONN_HEALTH_CHECKS"] is True
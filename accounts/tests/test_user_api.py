@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestUserApi:
+
+    url = reverse("accounts:api_user_list")
+    ndjson_url = reverse("accounts:api_user_list_ndjson")
+
+    @pytest.fixture
+    def create_users(self):
+        """更新日時が user0 → user4 の順に新しいユーザー"""
+        base_time = timezone.now()
+        users = []
+        for i in range(5):
+            user = CustomUser.objects.create(
+                username=f"user{i}",
+                email=f"user{i}@example.com" if i % 2 else f"user{i}@sample.jp",
+            )
+            CustomUser.objects.filter(pk=user.pk).update(
+                updated_at=base_time + timezone.timedelta(seconds=i)
+            )
+            users.append(user)
+        return users
+
+    def read_ndjson(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_pages_follow_cursor(self, client, create_users):
+        """limit 件ずつ、next_cursor で最後までたどれること"""
+        names = []
+        params = {"limit": 2}
+        while True:
+            data = client.get(self.url, params).json()
+            names += [row["username"] for row in data["results"]]
+            if not data["next_cursor"]:
+                break
+            params["cursor"] = data["next_cursor"]
+        assert names == ["user4", "user3", "user2", "user1", "user0"]
+
+    def test_filters_same_as_user_list(self, client, create_users):
+        """一覧と同じ検索条件で絞り込めること"""
+        data = client.get(self.url, {"email": "example.com"}).json()
+        assert [row["username"] for row in data["results"]] == ["user3", "user1"]
+
+    def test_fields_selects_columns(self, client, create_users):
+        """fields= で指定した列だけを返すこと"""
+        data = client.get(self.url, {"fields": "username,email", "limit": 1}).json()
+        assert data["results"] == [
+            {"username": "user4", "email": "user4@sample.jp"}
+        ]
+        assert data["next_cursor"]
+
+    def test_invalid_params(self, client, create_users):
+        """選べない列・壊れたカーソルは 400 を返すこと"""
+        response = client.get(self.url, {"fields": "username,password"})
+        assert response.status_code == 400
+        assert "password" in response.json()["error"]
+        assert client.get(self.url, {"cursor": "broken"}).status_code == 400
+
+    def test_ndjson_streams_all_rows(self, client, create_users, settings):
+        """NDJSON は読み込み単位をまたいで全件を1行ずつ返すこと"""
+        settings.USER_API_STREAM_CHUNK_SIZE = 2
+        response = client.get(self.ndjson_url, {"fields": "id,username"})
+
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = self.read_ndjson(response)
+        assert [row["username"] for row in rows] == [
+            "user4",
+            "user3",
+            "user2",
+            "user1",
+            "user0",
+        ]
+        assert set(rows[0]) == {"id", "username"}
+
+    def test_ndjson_resumes_from_cursor(self, client, create_users):
+        """JSON のカーソルの続きから NDJSON で読み込めること"""
+        cursor = client.get(self.url, {"limit": 2}).json()["next_cursor"]
+        response = client.get(self.ndjson_url, {"cursor": cursor})
+        rows = self.read_ndjson(response)
+        assert [row["username"] for row in rows] == ["user2", "user1", "user0"]
+        assert "created_at" in rows[0]
+
+    def test_deleted_users_excluded(self, client, create_users):
+        """削除済みのユーザーは返さないこと"""
+        create_users[4].delete()
+        data = client.get(self.url).json()
+        assert "user4" not in [row["username"] for row in data["results"]]
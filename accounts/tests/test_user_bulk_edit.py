@@ -0,0 +1,163 @@
+import csv
+import datetime
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from accounts import counts
+from accounts.bulk_edit import bulk_edit
+from accounts.models import CustomUser
+
+
+def make_csv(rows):
+    f = io.StringIO()
+    csv.writer(f).writerows(rows)
+    return f.getvalue()
+
+
+@pytest.mark.django_db
+class TestUserBulkEdit:
+
+    url = reverse("accounts:user_bulk_edit")
+
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(4)
+        ]
+
+    def post(self, client, rows, **params):
+        upload = SimpleUploadedFile(
+            "edit.csv", ("﻿" + make_csv(rows)).encode("utf-8"), "text/csv"
+        )
+        url = self.url + ("?format=json" if params.get("json") else "")
+        return client.post(url, {"csv_file": upload})
+
+    def test_applies_changes_and_reports_rows(self, client, create_users):
+        """変更を反映し、行ごとの結果を返すこと"""
+        u0, u1, u2, u3 = create_users
+        before = u0.updated_at
+        response = self.post(
+            client,
+            [
+                ["ID", "メールアドレス", "誕生日", "削除フラグ"],
+                [u0.pk, "new0@example.com", "2000-01-02", "False"],
+                [u1.pk, u1.email, "", "True"],
+                [u2.pk, u2.email, "", "False"],
+                [9999, "x@example.com", "", "False"],
+            ],
+            json=True,
+        )
+        summary = response.json()
+        counts_by_status = (summary["updated"], summary["unchanged"], summary["errors"])
+        assert counts_by_status == (2, 1, 1)
+        assert [row["status"] for row in summary["rows"]] == [
+            "updated",
+            "updated",
+            "unchanged",
+            "error",
+        ]
+
+        u0.refresh_from_db()
+        assert u0.email == "new0@example.com"
+        assert u0.birthday == datetime.date(2000, 1, 2)
+        assert u0.updated_at > before
+        deleted = CustomUser.all_with_deleted.get(pk=u1.pk)
+        assert deleted.is_deleted and not deleted.is_active
+        assert counts.total_count() == 3
+
+    def test_validation_same_as_edit_form(self, client, create_users):
+        """編集画面と同じ入力チェック・一意チェックをすること"""
+        u0, u1, u2, u3 = create_users
+        summary = self.post(
+            client,
+            [
+                ["ID", "メールアドレス"],
+                [u0.pk, "not-an-email"],
+                [u1.pk, u2.email],  # 既存ユーザーと重複
+                [u2.pk, "same@example.com"],
+                [u3.pk, "same@example.com"],  # ファイル内で重複
+                ["abc", "a@example.com"],
+            ],
+            json=True,
+        ).json()
+
+        statuses = {row["line"]: row for row in summary["rows"]}
+        assert statuses[2]["status"] == "error"
+        assert "メールアドレス" in statuses[2]["message"]
+        assert statuses[3]["status"] == "error"
+        assert statuses[4]["status"] == "updated"
+        assert statuses[5]["status"] == "error"
+        assert statuses[6]["message"] == "ID が不正です。"
+        u1.refresh_from_db()
+        assert u1.email == "user1@example.com"
+
+    def test_deleted_flag_values(self, create_users):
+        """削除フラグは 1/0・true/false・はい/いいえ を読み、それ以外はエラーにすること"""
+        u0, u1, u2, u3 = create_users
+        rows = [
+            ["ID", "削除フラグ"],
+            [u0.pk, "0"],
+            [u1.pk, "はい"],
+            [u2.pk, "FALSE"],
+            [u3.pk, "maybe"],
+        ]
+        result = bulk_edit(io.StringIO(make_csv(rows)))
+        assert [row[2] for row in sorted(result.rows)] == [
+            "unchanged",
+            "updated",
+            "unchanged",
+            "error",
+        ]
+        deleted = CustomUser.all_with_deleted.filter(is_deleted=True)
+        assert list(deleted.values_list("pk", flat=True)) == [u1.pk]
+
+    def test_non_utf8_file(self, client, create_users):
+        """UTF-8 でないファイルは 500 にせず、エラーで戻ること"""
+        text = make_csv([["ID", "メールアドレス"], [create_users[0].pk, "a@example.com"]])
+        upload = SimpleUploadedFile("edit.csv", text.encode("cp932"), "text/csv")
+        response = client.post(self.url, {"csv_file": upload})
+        assert response.status_code == 302
+        response = client.get(self.url)
+        assert "UTF-8" in response.content.decode()
+
+    def test_not_csv_file(self, client, create_users):
+        """拡張子が .csv でないファイルは読み込まず、エラーで戻ること"""
+        text = make_csv([["ID", "メールアドレス"], [create_users[0].pk, "a@example.com"]])
+        upload = SimpleUploadedFile("edit.txt", text.encode("utf-8"), "text/plain")
+        response = client.post(self.url, {"csv_file": upload})
+        assert response.status_code == 302
+        assert "CSVファイルを選択してください。" in client.get(self.url).content.decode()
+        assert not CustomUser.objects.filter(email="a@example.com").exists()
+
+    def test_queries_per_batch_not_per_row(
+        self, create_users, django_assert_max_num_queries
+    ):
+        """行数によらず、1バッチあたりのクエリ数が一定であること"""
+        rows = [["ID", "誕生日"]] + [[u.pk, "1999-12-31"] for u in create_users]
+        with django_assert_max_num_queries(6):
+            result = bulk_edit(io.StringIO(make_csv(rows)), batch_size=100)
+        assert result.count("updated") == 4
+
+    def test_export_round_trip(self, client, create_users, settings):
+        """差分エクスポートのCSVを編集してそのまま戻せること"""
+        settings.USER_INCREMENTAL_EXPORT_LAG_SECONDS = 0
+        response = client.get(reverse("accounts:export_users_csv"), {"since": ""})
+        text = b"".join(response.streaming_content).decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(text)))
+        rows[1][-1] = "True"
+
+        summary = self.post(client, rows, json=True).json()
+        assert (summary["updated"], summary["unchanged"]) == (1, 3)
+        assert CustomUser.objects.count() == 3
+
+    def test_html_summary_and_bad_header(self, client, create_users):
+        """結果を画面に表示し、見出しが不正ならエラーで戻ること"""
+        response = self.post(client, [["ID", "誕生日"], [create_users[0].pk, ""]])
+        assert response.status_code == 200
+        assert "変更なし 1 件" in response.content.decode()
+
+        response = self.post(client, [["Username", "Email"], ["a", "b"]])
+        assert response.status_code == 302
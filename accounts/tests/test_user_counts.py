@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts import counts
+from accounts.filters import filter_users
+from accounts.importer import import_users
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestUserCounts:
+
+    url = reverse("accounts:user_list")
+
+    @pytest.fixture
+    def create_users(self):
+        """テスト用ユーザーを作成"""
+        return [
+            CustomUser.objects.create(username="Alice", email="alice@example.com"),
+            CustomUser.objects.create(username="Bob", email="bob@sample.com"),
+        ]
+
+    def test_total_count_displayed(self, client, create_users):
+        """一覧に全件数が表示されること"""
+        response = client.get(self.url)
+        assert response.context["total_count"] == 2
+        assert "全 2 件" in response.content.decode()
+
+    def test_unfiltered_count_does_not_scan(self, create_users):
+        """検索条件なしの件数は COUNT(*) を実行しないこと"""
+        with CaptureQueriesContext(connection) as ctx:
+            assert counts.count_users({}, filter_users({})) == 2
+        assert not any("COUNT(" in q["sql"] for q in ctx.captured_queries)
+
+    def test_counter_follows_soft_delete_and_delete(self, create_users):
+        """論理削除・物理削除・一括登録で件数(削除済みを除く)が追従すること"""
+        create_users[0].delete()  # 論理削除
+        assert counts.total_count() == 1
+        CustomUser.objects.filter(pk=create_users[1].pk).delete()  # 物理削除
+        assert counts.total_count() == 0
+        CustomUser.objects.bulk_create(
+            [CustomUser(username="Carol", email="carol@example.com")]
+        )
+        assert counts.total_count() == 1
+        CustomUser.all_with_deleted.filter(pk=create_users[0].pk).delete()
+        assert counts.total_count() == 1
+
+    def test_filtered_count_is_cached(self, create_users):
+        """検索条件ごとの件数がキャッシュされること"""
+        params = {"email": "example", "username": ""}
+        assert counts.count_users(params, filter_users(params)) == 1
+
+        with CaptureQueriesContext(connection) as ctx:
+            # 空の条件や順番が違っても同じキャッシュを使う
+            same = {"username": "", "email": "example"}
+            assert counts.count_users(same, filter_users(same)) == 1
+        assert len(ctx.captured_queries) == 0
+
+    def test_filtered_count_invalidated_on_save(self, create_users):
+        """ユーザーを保存したらキャッシュが無効になること"""
+        params = {"email": "example"}
+        assert counts.count_users(params, filter_users(params)) == 1
+        CustomUser.objects.create(username="Carol", email="carol@example.com")
+        assert counts.count_users(params, filter_users(params)) == 2
+
+    def test_filtered_count_invalidated_on_import(self, create_users):
+        """CSVインポート(bulk_create)の後もキャッシュが無効になること"""
+        params = {"email": "example"}
+        assert counts.count_users(params, filter_users(params)) == 1
+        csv_file = io.StringIO(
+            "Username,Email\r\nCarol,carol@example.com\r\nDave,dave@example.com\r\n"
+        )
+        import_users(csv_file)
+        assert counts.count_users(params, filter_users(params)) == 3
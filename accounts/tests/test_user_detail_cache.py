@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from accounts import detail_cache
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestUserDetailCache:
+    @pytest.fixture
+    def user(self):
+        return CustomUser.objects.create(username="alice", email="alice@example.com")
+
+    def url(self, user):
+        return reverse("accounts:user_detail", kwargs={"pk": user.pk})
+
+    def test_second_request_is_cached(self, client, user, django_assert_num_queries):
+        """2回目の表示は更新日時を主キーで読むだけであること"""
+        client.get(self.url(user))
+        with django_assert_num_queries(1):
+            response = client.get(self.url(user))
+        assert response.status_code == 200
+        assert "alice@example.com" in response.content.decode()
+        assert detail_cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_invalidated_on_save(self, client, user):
+        """保存したらキャッシュが無効になること"""
+        client.get(self.url(user))
+        user.email = "new@example.com"
+        user.save()
+        assert "new@example.com" in client.get(self.url(user)).content.decode()
+
+    def test_updated_elsewhere(self, client, user):
+        """シグナルが届かない更新(ほかのプロセスなど)でも古いページを返さないこと"""
+        client.get(self.url(user))
+        CustomUser.all_with_deleted.filter(pk=user.pk).update(
+            email="new@example.com", updated_at=timezone.now()
+        )
+        assert "new@example.com" in client.get(self.url(user)).content.decode()
+
+    def test_invalidated_on_soft_delete(self, client, user):
+        """論理削除したらキャッシュが無効になること"""
+        client.get(self.url(user))
+        user.delete()
+        response = client.get(self.url(user))
+        assert "<strong>削除済み:</strong> はい" in response.content.decode()
+
+    def test_invalidated_on_edit(self, client, user):
+        """編集画面から保存したらキャッシュが無効になること"""
+        client.get(self.url(user))
+        edit_url = reverse("accounts:user_edit", kwargs={"pk": user.pk})
+        client.post(
+            edit_url,
+            {
+                "username": "alice2",
+                "email": "alice@example.com",
+                "birthday": "",
+                "version": user.updated_at.isoformat(),
+            },
+        )
+        response = client.get(self.url(user))
+        assert "alice2 の詳細" in response.content.decode()
+
+    def test_cache_stats_endpoint(self, client, user):
+        """ヒット・ミス回数を取得できること"""
+        client.get(self.url(user))
+        client.get(self.url(user))
+        response = client.get(reverse("accounts:cache_stats"))
+        assert response.json() == {"user_detail": {"hits": 1, "misses": 1}}
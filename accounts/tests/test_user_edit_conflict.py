@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+from django.db import OperationalError, connections
+from django.urls import reverse
+from accounts.forms import CustomUserEditForm
+from accounts.models import CustomUser
+
+
+def edit_data(user, **changes):
+    data = {
+        "username": user.username,
+        "email": user.email,
+        "birthday": "",
+        "version": user.updated_at.isoformat(),
+    }
+    data.update(changes)
+    return data
+
+
+@pytest.mark.django_db
+class TestUserEditConflict:
+    @pytest.fixture
+    def user(self):
+        return CustomUser.objects.create(username="alice", email="alice@example.com")
+
+    def url(self, user):
+        return reverse("accounts:user_edit", kwargs={"pk": user.pk})
+
+    def test_edit_page_has_version(self, client, user):
+        """編集画面に開いた時の更新日時が隠しフィールドで入ること"""
+        content = client.get(self.url(user)).content.decode()
+        assert f'value="{user.updated_at.isoformat()}"' in content
+
+    def test_conflict_is_form_error(self, client, user):
+        """先にほかの人が保存していたら、上書きせずフォームエラーにすること"""
+        stale = edit_data(user, username="from_a")
+        client.post(self.url(user), edit_data(user, email="b@example.com"))
+
+        response = client.post(self.url(user), stale)
+        assert response.status_code == 200
+        assert CustomUserEditForm.conflict_message in response.content.decode()
+        user.refresh_from_db()
+        assert (user.username, user.email) == ("alice", "b@example.com")
+
+    def test_updates_only_changed_fields(self, client, user, django_assert_num_queries):
+        """変更した列と updated_at だけを条件付きで UPDATE すること"""
+        response = client.post(self.url(user), edit_data(user, username="alice2"))
+        assert response.status_code == 302
+
+        form = CustomUserEditForm(
+            edit_data(CustomUser.objects.get(pk=user.pk), email="new@example.com"),
+            instance=CustomUser.objects.get(pk=user.pk),
+        )
+        assert form.is_valid()
+        with django_assert_num_queries(1) as ctx:
+            assert form.save_if_unchanged()
+        sql = ctx.captured_queries[0]["sql"]
+        assert '"email"' in sql and '"updated_at" =' in sql
+        assert '"username"' not in sql.split("WHERE")[0]
+
+
+# スレッドごとに別の接続になるので、テストのトランザクションの外で実行する
+@pytest.mark.django_db(transaction=True)
+class TestUserEditConcurrency:
+    threads = 8
+    increments = 10
+
+    def test_no_lost_updates(self):
+        """1行を多数のスレッドから同時に更新しても、更新が失われないこと"""
+        user = CustomUser.objects.create(
+            username="counter", email="counter@example.com", first_name="0"
+        )
+        start = threading.Barrier(self.threads)
+        conflicts = []
+        errors = []
+
+        def worker():
+            try:
+                start.wait()
+                done = 0
+                while done < self.increments:
+                    try:
+                        current = CustomUser.objects.get(pk=user.pk)
+                        version = current.updated_at
+                        current.first_name = str(int(current.first_name) + 1)
+                        saved = current.save_if_unchanged(version, ["first_name"])
+                    except OperationalError:
+                        # テスト用のメモリ上のDB(共有キャッシュ)は busy_timeout を待たずに
+                        # "table is locked" になるのでやり直す(UPDATE は実行されていない)
+                        continue
+                    if saved:
+                        done += 1
+                    else:
+                        conflicts.append(1)
+            except Exception as e:  # アサーションはメインスレッドで行う
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        assert errors == []
+        user.refresh_from_db()
+        assert user.first_name == str(self.threads * self.increments)
+        assert conflicts  # 実際に競合が起きていること
@@ -0,0 +1,63 @@
+import pytest
+from django.urls import reverse
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestUserListPagination:
+
+    url = reverse("accounts:user_list")
+
+    @pytest.fixture
+    def create_users(self, settings):
+        """ページサイズ2で5件のユーザーを作成"""
+        settings.USER_LIST_PAGE_SIZE = 2
+        users = []
+        for i in range(5):
+            users.append(
+                CustomUser.objects.create(
+                    username=f"user{i}", email=f"user{i}@example.com"
+                )
+            )
+        # 更新日時の降順(新しい順)
+        return list(reversed(users))
+
+    def test_first_page_has_next_link(self, client, create_users):
+        """先頭ページは page_size 件だけ表示し、次へのリンクを持つこと"""
+        response = client.get(self.url)
+        page = response.context["page"]
+
+        assert list(response.context["users"]) == create_users[:2]
+        assert page.has_next
+        assert not page.has_previous
+        assert response.context["next_query"] is not None
+
+    def test_walk_forward_and_back(self, client, create_users):
+        """次へ・前へで全件を重複なく辿れること"""
+        seen = []
+        cursor = None
+        while True:
+            response = client.get(self.url, {"cursor": cursor} if cursor else {})
+            page = response.context["page"]
+            seen.extend(page.object_list)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert seen == create_users
+
+        # 最終ページから前へ戻る
+        response = client.get(self.url, {"cursor": page.previous_cursor})
+        assert list(response.context["users"]) == create_users[2:4]
+
+    def test_next_link_keeps_filters(self, client, create_users):
+        """次へのリンクに検索条件が残ること"""
+        response = client.get(self.url, {"email": "example.com"})
+        assert "email=example.com" in response.context["next_query"]
+        assert "cursor=" in response.context["next_query"]
+
+    def test_invalid_cursor_falls_back_to_first_page(self, client, create_users):
+        """壊れたカーソルは先頭ページとして扱うこと"""
+        response = client.get(self.url, {"cursor": "!!broken!!"})
+        assert response.status_code == 200
+        assert list(response.context["users"]) == create_users[:2]
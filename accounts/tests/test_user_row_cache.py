@@ -0,0 +1,60 @@
+import pytest
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import reverse
+from accounts import row_cache
+from accounts.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestUserRowCache:
+
+    url = reverse("accounts:user_list")
+
+    @pytest.fixture
+    def create_users(self):
+        return [
+            CustomUser.objects.create(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(3)
+        ]
+
+    def test_rows_are_cached(self, client, create_users):
+        """2回目はキャッシュの HTML を使うこと"""
+        client.get(self.url)
+        cache = row_cache.get_cache()
+        user = create_users[0]
+        cache.set(row_cache._key(user), "<td>cached row</td>")
+
+        content = client.get(self.url).content.decode()
+        assert "<td>cached row</td>" in content
+        assert "user0@example.com" not in content
+        assert "user1@example.com" in content
+
+    def test_edit_refreshes_row(self, client, create_users):
+        """保存すると updated_at が変わり、その行だけ描画し直すこと"""
+        client.get(self.url)
+        user = create_users[1]
+        user.email = "changed@example.com"
+        user.save()
+
+        content = client.get(self.url).content.decode()
+        assert "changed@example.com" in content
+        assert "user1@example.com" not in content
+
+    def test_row_numbers_not_cached(self, create_users):
+        """No の列はキャッシュに含めず、並び順どおりに振ること"""
+        row_cache.render_rows(create_users)
+        rows = row_cache.render_rows(reversed(create_users))
+        assert [user.pk for user, _ in rows] == [u.pk for u in reversed(create_users)]
+        assert all("<td>1</td>" not in html for _, html in rows)
+
+    def test_disabled(self, create_users, settings):
+        """USER_ROW_CACHE が None なら毎回描画すること"""
+        settings.USER_ROW_CACHE = None
+        rows = row_cache.render_rows(create_users)
+        assert "user2@example.com" in rows[2][1]
+
+    def test_cached_template_loader(self):
+        """テンプレートはキャッシュローダーで読み込むこと"""
+        loaders = engines.all()[0].engine.template_loaders
+        assert isinstance(loaders[0], CachedLoader)
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from accounts import search
+from accounts.filters import filter_users
+from accounts.models import CustomUser
+
+
+def names(params):
+    return sorted(u.username for u in filter_users(params))
+
+
+@pytest.mark.django_db
+class TestUserSearch:
+    @pytest.fixture
+    def create_users(self):
+        """テスト用ユーザーを作成"""
+        CustomUser.objects.create(username="Alice", email="alice@example.com")
+        CustomUser.objects.create(username="alice_2", email="Alice2@SAMPLE.com")
+        CustomUser.objects.create(username="b*b?", email="bob@example.com")
+
+    def test_search_index_available_on_sqlite(self):
+        """SQLite では検索インデックスが作られていること"""
+        if connection.vendor == "sqlite":
+            assert search.is_available()
+
+    def test_username_is_case_sensitive(self, create_users):
+        """ユーザー名は大文字小文字を区別すること"""
+        assert names({"username": "Ali"}) == ["Alice"]
+        assert names({"username": "ali"}) == ["alice_2"]
+        assert names({"username": "lic"}) == ["Alice", "alice_2"]
+
+    def test_email_is_case_insensitive(self, create_users):
+        """メールアドレスは大文字小文字を区別しないこと"""
+        assert names({"email": "sample.COM"}) == ["alice_2"]
+        assert names({"email": "ALICE"}) == ["Alice", "alice_2"]
+
+    def test_short_and_special_terms(self, create_users):
+        """2文字以下や GLOB の特殊文字もそのまま部分一致すること"""
+        assert names({"username": "b*"}) == ["b*b?"]
+        assert names({"username": "?"}) == ["b*b?"]
+        assert names({"username": "*"}) == ["b*b?"]
+        assert names({"email": "e"}) == ["Alice", "alice_2", "b*b?"]
+
+    def test_index_follows_updates(self, create_users):
+        """更新・一括更新・削除が検索インデックスに反映されること"""
+        user = CustomUser.objects.get(username="Alice")
+        user.username = "Alicia"
+        user.save()
+        assert names({"username": "Alicia"}) == ["Alicia"]
+
+        CustomUser.objects.filter(username="alice_2").update(email="x@other.org")
+        assert names({"email": "other"}) == ["alice_2"]
+
+        CustomUser.objects.filter(username="Alicia").delete()
+        assert names({"username": "Ali"}) == []
+
+    def test_index_follows_bulk_create(self):
+        """bulk_create で登録したユーザーも検索できること"""
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(username=f"bulk{i}", email=f"bulk{i}@example.com")
+                for i in range(3)
+            ]
+        )
+        assert names({"username": "bulk"}) == ["bulk0", "bulk1", "bulk2"]
+
+    def test_export_uses_same_semantics(self, client, create_users):
+        """CSVエクスポートもユーザー名の大文字小文字を区別すること"""
+        url = reverse("accounts:export_users_csv")
+        response = client.get(url, {"username": "Ali"})
+        body = b"".join(response.streaming_content).decode("utf-8-sig")
+        assert "Alice" in body
+        assert "alice_2" not in body
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite の実行計画")
+    def test_search_uses_virtual_table_index(self):
+        """部分一致検索がユーザーテーブルの LIKE フルスキャンにならないこと"""
+        plan = filter_users({"username": "Alice"})[:50].explain()
+        assert "VIRTUAL TABLE INDEX" in plan, plan
+        assert "SEARCH accounts_customuser USING INTEGER PRIMARY KEY" in plan, plan
+        assert "LIKE" not in str(filter_users({"username": "Alice"}).query)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 app_name = "accounts"  # ← 名前空間を必ず設定
 
@@ -7,8 +7,25 @@ urlpatterns = [
     path("signup/", views.signup, name="signup"),
     path("users/", views.user_list, name="user_list"),
     path("users/<int:pk>/", views.user_detail, name="user_detail"),
+    path("users/cache-stats/", views.cache_stats, name="cache_stats"),
     path("users/<int:pk>/edit/", views.user_edit, name="user_edit"),
     path("users/<int:pk>/delete/", views.user_delete, name="user_delete"),
     path("users/export/", views.export_users_csv, name="export_users_csv"),
     path("users/import/", views.import_users_csv, name="import_users_csv"),
+    path("users/bulk-edit/", views.user_bulk_edit, name="user_bulk_edit"),
+    # JSON / NDJSON API
+    path("api/users/", api.user_list, name="api_user_list"),
+    path("api/users.ndjson", api.user_list_ndjson, name="api_user_list_ndjson"),
+    # 非同期(ASGI)版
+    path("async/users/", async_views.user_list, name="async_user_list"),
+    path(
+        "async/users/<int:pk>/", async_views.user_detail, name="async_user_detail"
+    ),
+    path(
+        "async/users/export/",
+        async_views.export_users_csv,
+        name="async_export_users_csv",
+    ),
+    path("users/jobs/<int:pk>/", views.job_status, name="job_status"),
+    path("users/jobs/<int:pk>/download/", views.job_download, name="job_download"),
 ]
@@ -1,14 +1,43 @@
+import csv
+
 from django.shortcuts import render, redirect, get_object_or_404
 from .forms import CustomUserCreationForm, CustomUserEditForm
-from .models import CustomUser
+from .models import CsvJob, CustomUser
 from django.contrib import messages
-from django.db.models import Q
-import csv
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from django.core.validators import validate_email
-from django.core.exceptions import ValidationError
-from django.utils.dateparse import parse_date
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.core.files.storage import default_storage
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+from .pagination import KeysetPaginator, InvalidCursor
+from .exporter import (
+    EXPORT_FIELDS,
+    EXPORT_HEADER,
+    INCREMENTAL_FIELDS,
+    INCREMENTAL_HEADER,
+    InvalidSinceToken,
+    changed_since,
+    export_rows,
+)
+from .bulk_edit import bulk_edit
+from .filters import filter_params, filter_users
+from .importer import InvalidHeader, open_csv
+from .counts import count_users
+from .conditional import (
+    detail_etag,
+    detail_last_modified,
+    detail_updated_at,
+    list_etag,
+)
+from . import detail_cache, export_formats, jobs, row_cache
+from .routers import read_db
 
 
 # ユーザー登録ビュー
@@ -16,11 +45,8 @@ def signup(request):
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            # ユーザー保存
-            user = form.save(commit=False)
-            raw_password = form.cleaned_data["password1"]
-            user.set_password(raw_password)  # パスワードをハッシュ化
-            user.save()
+            # ユーザー保存(パスワードはフォームでハッシュ化済み)
+            form.save()
 
             messages.success(request, "登録が完了しました")
 
@@ -31,58 +57,85 @@ def signup(request):
     return render(request, "accounts/signup.html", {"form": form})
 
 
+def user_list_context(request, params, page, total_count):
+    """一覧テンプレートのコンテキスト(非同期版の一覧と共通)"""
+    # 前後ページのリンクは検索条件を引き継ぐ
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    next_query = previous_query = None
+    if page.has_next:
+        query["cursor"] = page.next_cursor
+        next_query = query.urlencode()
+    if page.has_previous:
+        query["cursor"] = page.previous_cursor
+        previous_query = query.urlencode()
+
+    return {
+        "users": page.object_list,
+        "user_rows": row_cache.render_rows(page.object_list),
+        "page": page,
+        "total_count": total_count,
+        "next_query": next_query,
+        "previous_query": previous_query,
+        "username_query": params["username"],
+        "email_query": params["email"],
+        "created_from": params["created_from"],
+        "created_to": params["created_to"],
+        "updated_from": params["updated_from"],
+        "updated_to": params["updated_to"],
+    }
+
+
 # ユーザー一覧ビュー
+@condition(etag_func=list_etag)
 def user_list(request):
 
     # 検索機能(検索処理を行う、空白だと全件表示させる)
-    username_query = request.GET.get("username", "").strip()
-    email_query = request.GET.get("email", "").strip()
-    created_from = request.GET.get("created_from", "")
-    created_to = request.GET.get("created_to", "")
-    updated_from = request.GET.get("updated_from", "")
-    updated_to = request.GET.get("updated_to", "")
+    # ユーザー名は大文字小文字を区別、メールアドレスは区別しない
+    params = filter_params(request.GET)
+    users = filter_users(params, CustomUser.objects.using(read_db()))
 
-    users = CustomUser.objects.all().order_by("-updated_at", "-created_at")
-
-    # 検索機能(検索処理を行う、空白だと全件表示させる)
+    # カーソルページネーション(OFFSETを使わないので深いページでもコスト一定)
+    paginator = KeysetPaginator(
+        users, getattr(settings, "USER_LIST_PAGE_SIZE", 50)
+    )
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        page = paginator.page()
 
-    if username_query:  # 大文字と小文字の区別を行う
-        users = users.filter(username__contains=username_query)
-    if email_query:  # メールアドレスは大文字と小文字の区別を行わない
-        users = users.filter(email__icontains=email_query)
-
-    # 日付で絞り込み
-    if created_from:
-        users = users.filter(created_at__gte=parse_date(created_from))
-    if created_to:
-        users = users.filter(created_at__lte=parse_date(created_to))
-    if updated_from:
-        users = users.filter(updated_at__gte=parse_date(updated_from))
-    if updated_to:
-        users = users.filter(updated_at__lte=parse_date(updated_to))
-
-    context = {
-        "users": users,
-        "username_query": username_query,
-        "email_query": email_query,
-        "created_from": created_from,
-        "created_to": created_to,
-        "updated_from": updated_from,
-        "updated_to": updated_to,
-    }
+    context = user_list_context(request, params, page, count_users(params, users))
     return render(request, "accounts/user_list.html", context)
 
 
 # ユーザー詳細
+@condition(etag_func=detail_etag, last_modified_func=detail_last_modified)
 def user_detail(request, pk):
+    # 表示するメッセージがあるときはキャッシュを使わない
+    use_cache = len(messages.get_messages(request)) == 0
+    if use_cache:
+        # キーの更新日時は条件付きGETで読んだもの(なければここで主キーで読む)
+        updated_at = detail_updated_at(request, pk)
+        content = updated_at and detail_cache.get(pk, updated_at)
+        if content is not None:
+            return HttpResponse(content)
+
     user = get_object_or_404(CustomUser, pk=pk)
-    return render(
+    response = render(
         request,
         "accounts/user_detail.html",
         {
             "user": user,
         },
     )
+    if use_cache:
+        detail_cache.store(user, response.content)
+    return response
+
+
+# 詳細ページキャッシュのヒット・ミス回数
+def cache_stats(request):
+    return JsonResponse({"user_detail": detail_cache.stats()})
 
 
 # ユーザー編集
@@ -90,8 +143,8 @@ def user_edit(request, pk):
     user = get_object_or_404(CustomUser, pk=pk)
     if request.method == "POST":  # フォームが送信された場合
         form = CustomUserEditForm(request.POST, instance=user)
-        if form.is_valid():
-            form.save()
+        # 変更した列だけを、編集画面を開いてから更新されていない場合に保存する
+        if form.is_valid() and form.save_if_unchanged():
             messages.success(request, "ユーザー情報を編集しました")
             return redirect("accounts:user_detail", pk=user.pk)  # 詳細に戻る
     else:
@@ -111,48 +164,66 @@ def user_delete(request, pk):
     return render(request, "accounts/user_delete.html", {"user": user})
 
 
-User = get_user_model()
+def _unsupported_format(formats):
+    """選べない出力形式を指定されたときの 400"""
+    return HttpResponseBadRequest(f"format は {', '.join(formats)} のいずれかです")
 
 
 # CSVダウンロード機能
+@condition(etag_func=list_etag)
 def export_users_csv(request):
     # GET パラメータから検索条件を取得
-    username_query = request.GET.get("username", "").strip()
-    email_query = request.GET.get("email", "").strip()
-    created_from_date = request.GET.get("created_from", "").strip()
-    created_to_date = request.GET.get("created_to", "").strip()
-    updated_from_date = request.GET.get("updated_from", "").strip()
-    updated_to_date = request.GET.get("updated_to", "").strip()
-
-    # フィルタ条件を組み立てる
-    users = User.objects.filter(
-        Q(username__icontains=username_query) if username_query else Q(),
-        Q(email__icontains=email_query) if email_query else Q(),
-        Q(created_at__gte=created_from_date) if created_from_date else Q(),
-        Q(created_at__lte=created_to_date) if created_to_date else Q(),
-        Q(updated_at__gte=updated_from_date) if updated_from_date else Q(),
-        Q(updated_at__lte=updated_to_date) if updated_to_date else Q(),
-    ).order_by("-updated_at", "-created_at")
-
-    # CSVを生成
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="users.csv"'
-    response.write("\ufeff")
-    writer = csv.writer(response)
-    writer.writerow(
-        ["ID", "ユーザー名", "メールアドレス", "誕生日", "作成日時", "更新日時"]
+    params = filter_params(request.GET)
+
+    # 別スレッドのジョブとして実行し、すぐにジョブIDを返す
+    # (ジョブが書き出すのは通常の列の CSV だけなので、差分エクスポートや
+    #  CSV 以外の形式とは組み合わせられない)
+    if request.GET.get("background"):
+        if "since" in request.GET:
+            return HttpResponseBadRequest("since は background と同時に指定できません")
+        try:
+            export_format = export_formats.select_format(request)
+        except export_formats.UnsupportedFormat:
+            export_format = None
+        if export_format != "csv":
+            return _unsupported_format(["csv"])
+        job = jobs.submit_export(params, using=read_db())
+        return JsonResponse(jobs.job_status(job), status=202)
+
+    # 出力形式(?format= か Accept ヘッダー。csv / csv.gz / parquet / arrow)
+    try:
+        export_format = export_formats.select_format(request)
+    except export_formats.UnsupportedFormat:
+        return _unsupported_format(export_formats.available_formats())
+
+    # 差分エクスポート(since=前回のトークン、空なら最初から)
+    # 前回より後に作成・更新・削除されたユーザーだけを返し、次回のトークンをヘッダーで渡す
+    # 行はレスポンスを返した後に読むので、読み込み先のDBをここで決めておく
+    if "since" in request.GET:
+        users = filter_users(params, CustomUser.all_with_deleted.using(read_db()))
+        try:
+            users, next_token = changed_since(users, request.GET["since"])
+        except InvalidSinceToken:
+            return HttpResponseBadRequest("since が不正です")
+        fields, header = INCREMENTAL_FIELDS, INCREMENTAL_HEADER
+        filename = "users_changes"
+    else:
+        users = filter_users(params, CustomUser.objects.using(read_db()))
+        next_token = None
+        fields, header = EXPORT_FIELDS, EXPORT_HEADER
+        filename = "users"
+
+    # ストリーミングで返す(全件をメモリに載せない)
+    content_type, extension = export_formats.FORMATS[export_format]
+    rows = export_rows(users, fields)
+    response = StreamingHttpResponse(
+        export_formats.stream_export(rows, export_format, fields, header),
+        content_type=content_type,
     )
-    for user in users:
-        writer.writerow(
-            [
-                user.username,
-                user.email,
-                user.birthday,
-                user.created_at,
-                user.updated_at,
-            ]
-        )
-
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    if next_token is not None:
+        response["X-Next-Since"] = next_token
+    patch_vary_headers(response, ["Accept"])
     return response
 
 
@@ -166,55 +237,60 @@ def import_users_csv(request):
             messages.error(request, "CSVファイルを選択してください。")
             return redirect("accounts:user_list")
 
-        # ファイル読み込み
-        decoded_file = csv_file.read().decode("utf-8").splitlines()
-        reader = csv.DictReader(decoded_file)
+        # 登録処理はジョブとして別スレッドで実行する
+        job = jobs.submit_import(csv_file)
+        request.session["import_job"] = job.pk
+        messages.info(request, f"インポートを受け付けました。(ジョブID: {job.pk})")
 
-        # ヘッダー検証
-        expected_headers = ["Username", "Email"]
-        if reader.fieldnames != expected_headers:
-            messages.error(
-                request,
-                "CSVヘッダーが正しくありません。",
-            )
-            return redirect("accounts:user_list")
+    return redirect("accounts:user_list")
 
-        success_count = 0
-        error_count = 0
-
-        # 各行を検証しながら登録
-        for i, row in enumerate(reader, start=2):  # 2行目からデータ開始
-            username = row.get("Username", "").strip()
-            email = row.get("Email", "").strip()
-
-            # 必須項目チェック
-            if not username or not email:
-                messages.warning(
-                    request, f"{i}行目: ユーザー名またはメールアドレスが空です。"
-                )
-                error_count += 1
-                continue
-
-            # メール形式チェック
-            try:
-                validate_email(email)
-            except ValidationError:
-                messages.warning(
-                    request, f"{i}行目: メールアドレス形式が不正です。({email})"
-                )
-                error_count += 1
-                continue
-
-            # 既存ユーザー重複チェック
-            if User.objects.filter(username=username).exists():
-                messages.info(
-                    request,
-                    f"{i}行目: ユーザー '{username}' は既に存在します。スキップしました。",
-                )
-                continue
-
-            # 作成
-            User.objects.create(username=username, email=email)
-            success_count += 1
 
-    return redirect("accounts:user_list")
+# ユーザー一括編集(CSVアップロード、結果を行ごとに表示)
+def user_bulk_edit(request):
+    context = {}
+    if request.method == "POST" and request.FILES.get("csv_file"):
+        csv_file = request.FILES["csv_file"]
+
+        # CSVチェック(インポートと同じ)
+        if not csv_file.name.endswith(".csv"):
+            messages.error(request, "CSVファイルを選択してください。")
+            return redirect("accounts:user_bulk_edit")
+
+        try:
+            result = bulk_edit(
+                open_csv(csv_file),
+                batch_size=getattr(settings, "USER_BULK_EDIT_BATCH_SIZE", 500),
+            )
+        except InvalidHeader:
+            messages.error(
+                request, "CSVに ID 列と、変更する列(メールアドレス・誕生日・削除フラグ)が必要です。"
+            )
+            return redirect("accounts:user_bulk_edit")
+        except (UnicodeDecodeError, csv.Error):
+            # 読めたところまでのバッチは反映済み
+            messages.error(
+                request, "CSVファイルを読み込めませんでした。UTF-8で保存してください。"
+            )
+            return redirect("accounts:user_bulk_edit")
+        summary = result.summary()
+        if request.GET.get("format") == "json":
+            return JsonResponse(summary, json_dumps_params={"ensure_ascii": False})
+        context["summary"] = summary
+    return render(request, "accounts/user_bulk_edit.html", context)
+
+
+# ジョブの状態確認
+def job_status(request, pk):
+    job = get_object_or_404(CsvJob, pk=pk)
+    return JsonResponse(jobs.job_status(job))
+
+
+# ジョブの結果ファイルをダウンロード
+def job_download(request, pk):
+    job = get_object_or_404(CsvJob, pk=pk, status=CsvJob.STATUS_DONE)
+    if not job.result or not default_storage.exists(job.result):
+        raise Http404("ファイルがありません。")
+    filename = "users.csv" if job.kind == CsvJob.KIND_EXPORT else "import_errors.csv"
+    response = FileResponse(default_storage.open(job.result), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,57 @@
+"""
+CSVエクスポートの形式ごとの転送量と時間
+
+    python -m benchmarks.bench_export_formats --users 200000
+
+- export_users_csv を format= を変えて全件取得し、レスポンスの合計バイト数と
+  最後のバイトを受け取るまでの時間を出す
+- parquet / arrow は pyarrow がインストールされている場合だけ計測する
+"""
+
+import argparse
+
+from benchmarks.common import setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    teardown = setup_django()
+    try:
+        from django.test import Client, override_settings
+        from django.urls import reverse
+
+        from accounts import export_formats
+        from accounts.seeding import seed_users
+
+        seed_users(args.users, deleted_fraction=0)
+        client = Client()
+        url = reverse("accounts:export_users_csv")
+        baseline = None
+        with override_settings(REQUEST_METRICS_LOG=False):
+            for name in export_formats.FORMATS:
+                if name not in export_formats.available_formats():
+                    print(f"{name:8s} skipped (pyarrow がありません)")
+                    continue
+                seconds = []
+                for _ in range(args.rounds):
+                    with timer() as t:
+                        response = client.get(url, {"format": name})
+                        size = sum(len(c) for c in response.streaming_content)
+                    seconds.append(t["seconds"])
+                baseline = baseline or size
+                best = min(seconds)
+                print(
+                    f"{name:8s} {size / 1024 / 1024:8.2f} MiB "
+                    f"({size / baseline * 100:5.1f}%)  {best:6.2f}s  "
+                    f"{args.users / best:9.0f} rows/s"
+                )
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+CSVインポートのベンチマーク(旧: 1行ずつ exists()+create() / 新: バッチ登録)
+
+    python -m benchmarks.bench_import_users_csv --rows 20000
+"""
+
+import argparse
+import csv
+import io
+
+from benchmarks.common import setup_django, timer
+
+
+def make_csv(rows, offset=0):
+    f = io.StringIO()
+    writer = csv.writer(f)
+    writer.writerow(["Username", "Email"])
+    for i in range(offset, offset + rows):
+        writer.writerow([f"bench{i}", f"bench{i}@example.com"])
+    return f.getvalue()
+
+
+def legacy_import(text):
+    """変更前の import_users_csv と同じクエリパターン"""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    reader = csv.DictReader(text.splitlines())
+    for row in reader:
+        username = row["Username"].strip()
+        email = row["Email"].strip()
+        if User.objects.filter(username=username).exists():
+            continue
+        User.objects.create(username=username, email=email)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    teardown = setup_django()
+    try:
+        from accounts.importer import import_users
+
+        with timer() as legacy:
+            legacy_import(make_csv(args.rows))
+        with timer() as batched:
+            import_users(
+                io.StringIO(make_csv(args.rows, offset=args.rows)),
+                batch_size=args.batch_size,
+            )
+    finally:
+        teardown()
+
+    for name, t in (("legacy", legacy), ("batched", batched)):
+        print(
+            f"{name:8s} {args.rows} rows  {t['seconds']:.2f}s  "
+            f"{args.rows / t['seconds']:,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+新規登録(signup)のスループット計測
+
+    python -m benchmarks.bench_signup --signups 200
+
+- ハッシャーのプロファイルごとに、1コアあたりの登録件数/秒を出す
+  (1スレッドで順番に POST するので、結果はそのまま 1コアあたりの値)
+- argon2 は argon2-cffi がインストールされている場合だけ計測する
+"""
+
+import argparse
+
+from benchmarks.common import setup_django, timer
+
+PROFILES = {
+    "pbkdf2 (Django標準)": ("accounts.hashers.PBKDF2PasswordHasher", {}),
+    "pbkdf2 (100k)": (
+        "accounts.hashers.PBKDF2PasswordHasher",
+        {"pbkdf2": {"iterations": 100000}},
+    ),
+    "scrypt (2^14, p=1)": (
+        "accounts.hashers.ScryptPasswordHasher",
+        {"scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 1}},
+    ),
+    "argon2 (t=2, 64MiB, p=1)": (
+        "accounts.hashers.Argon2PasswordHasher",
+        {"argon2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1}},
+    ),
+    "md5 (テスト用)": ("django.contrib.auth.hashers.MD5PasswordHasher", {}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signups", type=int, default=200)
+    args = parser.parse_args()
+
+    teardown = setup_django()
+    try:
+        from django.test import Client, override_settings
+        from django.urls import reverse
+
+        client = Client()
+        url = reverse("accounts:signup")
+        offset = 0
+        for name, (hasher, params) in PROFILES.items():
+            if "argon2" in hasher.lower():
+                try:
+                    import argon2  # noqa: F401
+                except ImportError:
+                    print(f"{name:26s} skipped (argon2-cffi がありません)")
+                    continue
+
+            with override_settings(
+                PASSWORD_HASHERS=[hasher], PASSWORD_HASHER_PARAMS=params
+            ):
+                with timer() as t:
+                    for i in range(offset, offset + args.signups):
+                        client.post(
+                            url,
+                            {
+                                "username": f"bench{i}",
+                                "email": f"bench{i}@example.com",
+                                "password1": "bench-pass-123",
+                                "birthday": "2000-01-01",
+                            },
+                        )
+            offset += args.signups
+            print(
+                f"{name:26s} {args.signups / t['seconds']:8.1f} signups/s/core  "
+                f"({t['seconds'] / args.signups * 1000:.1f} ms/signup)"
+            )
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
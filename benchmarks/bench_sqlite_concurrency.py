@@ -0,0 +1,192 @@
+"""
+CSVインポート(書き込み)中のユーザー一覧(読み込み)のレイテンシ比較
+
+    python -m benchmarks.bench_sqlite_concurrency --users 50000 --rows 20000
+
+- 一時ファイルのSQLiteに対して、次の2つの設定で同じ処理を行う
+    default: Django 既定(journal_mode=DELETE、PRAGMA・transaction_mode なし)
+    tuned:   settings.py の SQLITE_PRAGMAS と transaction_mode=IMMEDIATE
+- import_users で --rows 行を登録している間、
+  --readers 個のプロセスがユーザー一覧を取得し続け、
+  1つのプロセスが soft_delete()(読み込んでから書き込むトランザクション)を繰り返す
+- 設定ごとに別プロセスで実行する(DB設定は接続を作る前に決める必要があるため)
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ("default", "tuned")
+
+
+def run_profile(profile, users, rows, readers, batch_size):
+    """1つの設定で計測し、結果の辞書を返す(子プロセスで実行する)"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    from django.conf import settings
+
+    tmpdir = tempfile.mkdtemp()
+    database = settings.DATABASES["default"]
+    database["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+    if profile == "default":
+        database["OPTIONS"] = {}
+        database["CONN_MAX_AGE"] = 0
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import OperationalError, connection
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.importer import import_users
+    from accounts.seeding import seed_users
+
+    call_command("migrate", verbosity=0)
+    seed_users(users)
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    connection.close()
+
+    f = io.StringIO()
+    writer = csv.writer(f)
+    writer.writerow(["Username", "Email"])
+    for i in range(rows):
+        writer.writerow([f"writer{i}", f"writer{i}@example.com"])
+    f.seek(0)
+
+    # GIL の影響を受けないよう、読み込みは別プロセスで行う(fork で Django の設定を引き継ぐ)
+    ctx = multiprocessing.get_context("fork")
+    done = ctx.Event()
+    results = ctx.Queue()
+
+    def reader():
+        client = Client()
+        url = reverse("accounts:user_list")
+        latencies = []
+        errors = 0
+        with override_settings(REQUEST_METRICS_LOG=False):
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    client.get(url, {"email": "example.jp"})
+                except OperationalError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        connection.close()
+        results.put((latencies, errors))
+
+    def editor():
+        # 管理画面の一括削除と同じ、読み込んでから書き込むトランザクション
+        from accounts.models import CustomUser
+
+        latencies = []
+        errors = 0
+        pk = 0
+        while not done.is_set():
+            pk += 1
+            start = time.perf_counter()
+            try:
+                CustomUser.objects.filter(pk__in=[pk, pk + 1]).soft_delete()
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+        edits.put((latencies, errors))
+
+    edits = ctx.Queue()
+    processes = [ctx.Process(target=reader) for _ in range(readers)]
+    processes.append(ctx.Process(target=editor))
+    for p in processes:
+        p.start()
+    start = time.perf_counter()
+    import_users(f, batch_size=batch_size)
+    write_seconds = time.perf_counter() - start
+    done.set()
+    latencies = []
+    errors = 0
+    for _ in range(readers):
+        reader_latencies, reader_errors = results.get()
+        latencies.extend(reader_latencies)
+        errors += reader_errors
+    edit_latencies, edit_errors = edits.get()
+    for p in processes:
+        p.join()
+    connection.close()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "journal_mode": journal_mode,
+        "write_seconds": round(write_seconds, 2),
+        "reads": len(latencies),
+        "reads_per_s": round(len(latencies) / write_seconds, 1),
+        "p50_ms": (
+            round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None
+        ),
+        "p99_ms": (
+            round(latencies[int(len(latencies) * 0.99)] * 1000, 1)
+            if latencies
+            else None
+        ),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        "locked_errors": errors,
+        "edits": len(edit_latencies),
+        "edit_max_ms": round(max(edit_latencies, default=0) * 1000, 1),
+        "edit_locked_errors": edit_errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        result = run_profile(
+            args.profile, args.users, args.rows, args.readers, args.batch_size
+        )
+        print(json.dumps(result))
+        return
+
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_concurrency"]
+            + ["--profile", profile, "--users", str(args.users)]
+            + ["--rows", str(args.rows), "--readers", str(args.readers)]
+            + ["--batch-size", str(args.batch_size)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{r['profile']:8s} journal={r['journal_mode']:7s} "
+            f"import {r['write_seconds']:6.2f}s  "
+            f"reads {r['reads_per_s']:7.1f}/s  p50 {r['p50_ms']}ms  "
+            f"p99 {r['p99_ms']}ms  max {r['max_ms']}ms  "
+            f"locked errors {r['locked_errors']}"
+        )
+        print(
+            f"{'':8s} edits {r['edits']}  max {r['edit_max_ms']}ms  "
+            f"locked errors {r['edit_locked_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
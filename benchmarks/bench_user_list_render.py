@@ -0,0 +1,81 @@
+"""
+ユーザー一覧テンプレートの描画時間(1,000行あたり)
+
+    python -m benchmarks.bench_user_list_render --rows 1000 --rounds 20
+
+- 次の3つの設定で、--rows 行の一覧(user_list.html)の描画を --rounds 回計測する
+    読み込み毎回:    キャッシュローダーなし、行キャッシュなし(変更前)
+    キャッシュローダー: テンプレートのパースは初回だけ、行キャッシュなし
+    + 行キャッシュ:   キャッシュローダーと行キャッシュ(キャッシュ済みの状態)
+- 行の描画(row_cache.render_rows)も描画時間に含める。DBの読み込みは含めない
+"""
+
+import argparse
+import statistics
+
+from benchmarks.common import setup_django, timer
+
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+PROFILES = {
+    "読み込み毎回": (LOADERS, None),
+    "キャッシュローダー": ([("django.template.loaders.cached.Loader", LOADERS)], None),
+    "+ 行キャッシュ": (
+        [("django.template.loaders.cached.Loader", LOADERS)],
+        "rows",
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    teardown = setup_django()
+    try:
+        from django.conf import settings
+        from django.core.cache import caches
+        from django.template.loader import render_to_string
+        from django.test import RequestFactory, override_settings
+
+        from accounts import row_cache
+        from accounts.models import CustomUser
+        from accounts.seeding import seed_users
+
+        seed_users(args.rows, deleted_fraction=0)
+        users = list(CustomUser.objects.order_by("-updated_at", "-created_at"))
+        request = RequestFactory().get("/accounts/")
+        request.session = {}
+        caches["rows"].clear()
+
+        for name, (loaders, cache_alias) in PROFILES.items():
+            templates = [dict(settings.TEMPLATES[0])]
+            templates[0]["OPTIONS"] = dict(templates[0]["OPTIONS"], loaders=loaders)
+            with override_settings(TEMPLATES=templates, USER_ROW_CACHE=cache_alias):
+                samples = []
+                # 1回目(パース・キャッシュへの保存)は計測しない
+                for _ in range(args.rounds + 1):
+                    with timer() as t:
+                        render_to_string(
+                            "accounts/user_list.html",
+                            {"users": users, "user_rows": row_cache.render_rows(users)},
+                            request,
+                        )
+                    samples.append(t["seconds"])
+            samples = samples[1:]
+            per_1000 = [s / len(users) * 1000 * 1000 for s in samples]
+            print(
+                f"{name:12s} {statistics.median(per_1000):8.1f} ms/1,000行 (中央値)  "
+                f"min {min(per_1000):7.1f}  max {max(per_1000):7.1f}"
+            )
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
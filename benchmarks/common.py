@@ -0,0 +1,38 @@
+"""
+ベンチマーク用の共通処理
+- mysite.settings を読み込み、テスト用DB(SQLiteならメモリ上)を作成する
+- リポジトリのルートから python -m benchmarks.<スクリプト名> で実行する
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Django を初期化してテスト用DBを作成し、後片付け用の関数を返す"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+@contextmanager
+def timer():
+    """経過秒数を result["seconds"] に入れるタイマー"""
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result["seconds"] = time.perf_counter() - start
@@ -0,0 +1,100 @@
+"""
+同期(WSGI)版と非同期(ASGI)版のビューのスループット比較
+
+あらかじめ2つのサーバーを起動しておく(ワーカー数は揃える)
+
+    gunicorn mysite.wsgi -w 4 -b 127.0.0.1:8000
+    uvicorn mysite.asgi:application --workers 4 --port 8001
+
+    python -m benchmarks.loadtest_asgi \\
+        --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001 \\
+        --concurrency 200 --requests 5000
+
+- 外部ライブラリは使わず asyncio で HTTP/1.1 リクエストを送る
+- 1リクエストごとに接続を閉じる(ストリーミングのCSVも最後まで読む)
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+# (名前, 同期版のパス, 非同期版のパス)
+TARGETS = [
+    ("user_list", "/accounts/users/", "/accounts/async/users/"),
+    ("user_detail", "/accounts/users/{pk}/", "/accounts/async/users/{pk}/"),
+    ("export", "/accounts/users/export/", "/accounts/async/users/export/"),
+]
+
+
+async def fetch(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    while await reader.read(65536):
+        pass
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def run(base_url, path, concurrency, total):
+    url = urlsplit(base_url)
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                status = await fetch(url.hostname, url.port or 80, path)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wsgi", default="http://127.0.0.1:8000")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8001")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pk", type=int, default=1, help="詳細ページのユーザーID")
+    args = parser.parse_args()
+
+    for name, sync_path, async_path in TARGETS:
+        for label, base, path in (
+            ("wsgi", args.wsgi, sync_path),
+            ("asgi", args.asgi, async_path),
+        ):
+            result = asyncio.run(
+                run(base, path.format(pk=args.pk), args.concurrency, args.requests)
+            )
+            print(
+                f"{name:12s} {label}  {result['rps']:8.1f} req/s  "
+                f"p50 {result['p50']:7.1f}ms  p99 {result['p99']:7.1f}ms  "
+                f"errors {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+accounts の主要な処理のベンチマークスイート
+
+    python -m benchmarks.suite --users 10000 --save benchmarks/baseline-10k.json
+    python -m benchmarks.suite --users 10000 --compare benchmarks/baseline-10k.json
+
+- --users 件(10000 / 100000 / 1000000 など)のユーザーを作ってから計測する
+- 1件ごとの処理時間の p50 / p99、スループット、1回あたりのSQL件数を記録する
+- --compare で前回の結果と比べ、p50 が --threshold(既定 20%)より遅くなったか、
+  SQL件数が増えたベンチマークがあれば終了コード 1 で終わる
+- --only で名前の一部に一致するベンチマークだけを実行する
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.common import setup_django
+
+# ベンチマーク関数の一覧((名前, 関数, 回数))
+BENCHMARKS = []
+
+
+def bench(name, rounds=20):
+    """ベンチマーク関数を登録する。関数は (benchmark, ctx) を受け取る"""
+
+    def decorator(func):
+        BENCHMARKS.append((name, func, rounds))
+        return func
+
+    return decorator
+
+
+def percentile(values, q):
+    """最近傍順位法のパーセンタイル"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Benchmark:
+    """
+    pytest-benchmark の benchmark フィクスチャと同じように使う計測器
+
+        benchmark(func, setup=...)
+
+    - setup() の戻り値(タプル)を func の引数にする。setup の時間は含めない
+    - func が数値を返したら、処理した行数としてスループットに使う
+    """
+
+    def __init__(self, name, rounds, warmup=1):
+        self.name = name
+        self.rounds = rounds
+        self.warmup = warmup
+        self.stats = None
+
+    def __call__(self, func, setup=None):
+        from accounts.metrics import track
+
+        for _ in range(self.warmup):
+            func(*(setup() if setup else ()))
+
+        seconds = []
+        queries = []
+        items = 0
+        for _ in range(self.rounds):
+            args = setup() if setup else ()
+            with track() as metrics:
+                start = time.perf_counter()
+                result = func(*args)
+                seconds.append(time.perf_counter() - start)
+            queries.append(metrics.queries)
+            if isinstance(result, int):
+                items += result
+
+        total = sum(seconds)
+        self.stats = {
+            "rounds": self.rounds,
+            "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+            "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+            "mean_ms": round(total / self.rounds * 1000, 3),
+            "ops_per_s": round(self.rounds / total, 2),
+            "rows_per_s": round(items / total, 1) if items else None,
+            "queries": percentile(queries, 50),
+        }
+        return self.stats
+
+
+class Context:
+    """ベンチマーク関数が共有するクライアントとサンプルデータ"""
+
+    def __init__(self, users):
+        from django.test import Client
+        from django.utils import timezone
+
+        from accounts.models import CustomUser
+
+        self.users = users
+        self.client = Client()
+        self.now = timezone.now()
+        # 詳細ページ用のユーザーID(削除済みを除く)
+        self.pks = list(
+            CustomUser.objects.order_by("?").values_list("pk", flat=True)[:200]
+        )
+        self.counter = itertools.count(users)
+
+
+def _get(client, url, params=None):
+    response = client.get(url, params or {})
+    assert response.status_code == 200, (url, response.status_code)
+    if response.streaming:
+        return sum(chunk.count(b"\n") for chunk in response.streaming_content) - 1
+    return None
+
+
+# ---- ユーザー一覧(検索条件の組み合わせごと) ----
+
+LIST_FILTERS = {
+    "username": lambda ctx: {"username": "user00012"},
+    "email": lambda ctx: {"email": "example.jp"},
+    "created": lambda ctx: {
+        "created_from": (ctx.now - timedelta(days=365)).date().isoformat(),
+        "created_to": ctx.now.date().isoformat(),
+    },
+    "updated": lambda ctx: {
+        "updated_from": (ctx.now - timedelta(days=90)).date().isoformat(),
+    },
+}
+
+
+def _register_user_list(names):
+    label = "+".join(names) or "none"
+
+    @bench(f"user_list[{label}]")
+    def user_list(benchmark, ctx):
+        from django.urls import reverse
+
+        params = {}
+        for name in names:
+            params.update(LIST_FILTERS[name](ctx))
+        benchmark(lambda: _get(ctx.client, reverse("accounts:user_list"), params))
+
+
+for size in range(len(LIST_FILTERS) + 1):
+    for names in itertools.combinations(LIST_FILTERS, size):
+        _register_user_list(names)
+
+
+@bench("user_list[next_page]")
+def user_list_next_page(benchmark, ctx):
+    from django.urls import reverse
+
+    url = reverse("accounts:user_list")
+    cursor = ctx.client.get(url).context["page"].next_cursor
+    benchmark(lambda: _get(ctx.client, url, {"cursor": cursor}))
+
+
+# ---- ユーザー詳細 ----
+
+
+@bench("user_detail[cold]", rounds=50)
+def user_detail_cold(benchmark, ctx):
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    pks = itertools.cycle(ctx.pks)
+
+    def setup():
+        cache.clear()
+        return (reverse("accounts:user_detail", kwargs={"pk": next(pks)}),)
+
+    benchmark(lambda url: _get(ctx.client, url), setup=setup)
+
+
+@bench("user_detail[cached]", rounds=50)
+def user_detail_cached(benchmark, ctx):
+    from django.urls import reverse
+
+    url = reverse("accounts:user_detail", kwargs={"pk": ctx.pks[0]})
+    benchmark(lambda: _get(ctx.client, url))
+
+
+# ---- CSVエクスポート ----
+
+
+@bench("export_users_csv[all]", rounds=3)
+def export_all(benchmark, ctx):
+    from django.urls import reverse
+
+    benchmark(lambda: _get(ctx.client, reverse("accounts:export_users_csv")))
+
+
+@bench("export_users_csv[email]", rounds=5)
+def export_filtered(benchmark, ctx):
+    from django.urls import reverse
+
+    url = reverse("accounts:export_users_csv")
+    benchmark(lambda: _get(ctx.client, url, {"email": "example.jp"}))
+
+
+# ---- CSVインポート(1000行) ----
+
+
+@bench("import_users_csv[1000]", rounds=5)
+def import_csv(benchmark, ctx):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import override_settings
+    from django.urls import reverse
+
+    rows = 1000
+
+    def setup():
+        start = next(ctx.counter) * rows
+        f = io.StringIO()
+        writer = csv.writer(f)
+        writer.writerow(["Username", "Email"])
+        for i in range(start, start + rows):
+            writer.writerow([f"import{i}", f"import{i}@example.com"])
+        upload = SimpleUploadedFile("users.csv", f.getvalue().encode("utf-8"))
+        return (upload,)
+
+    def run(upload):
+        response = ctx.client.post(
+            reverse("accounts:import_users_csv"), {"csv_file": upload}
+        )
+        assert response.status_code == 302, response.status_code
+        return rows
+
+    with override_settings(CSV_JOBS_EAGER=True):
+        benchmark(run, setup=setup)
+
+
+# ---- 新規登録(PASSWORD_HASHERS の設定のまま) ----
+
+
+@bench("signup", rounds=10)
+def signup(benchmark, ctx):
+    from django.urls import reverse
+
+    def setup():
+        i = next(ctx.counter)
+        return (
+            {
+                "username": f"signup{i}",
+                "email": f"signup{i}@example.com",
+                "password1": "bench-pass-123",
+                "birthday": "2000-01-01",
+            },
+        )
+
+    def run(data):
+        response = ctx.client.post(reverse("accounts:signup"), data)
+        assert response.status_code == 302, response.status_code
+
+    benchmark(run, setup=setup)
+
+
+# ---- 実行・比較 ----
+
+
+def format_stats(name, stats):
+    line = (
+        f"{name:42s} p50 {stats['p50_ms']:9.2f}ms  p99 {stats['p99_ms']:9.2f}ms"
+        f"  {stats['ops_per_s']:8.1f} ops/s  {stats['queries']:3d} queries"
+    )
+    if stats["rows_per_s"]:
+        line += f"  {stats['rows_per_s']:10,.0f} rows/s"
+    return line
+
+
+def compare(results, baseline, threshold):
+    """baseline より悪くなったベンチマークの説明のリストを返す"""
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        limit = old["p50_ms"] * (1 + threshold)
+        if stats["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {old['p50_ms']:.2f}ms -> {stats['p50_ms']:.2f}ms "
+                f"(+{stats['p50_ms'] / old['p50_ms'] - 1:.0%})"
+            )
+        if stats["queries"] > old["queries"]:
+            regressions.append(
+                f"{name}: queries {old['queries']} -> {stats['queries']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--only", help="名前にこの文字列を含むベンチマークだけ実行")
+    parser.add_argument("--save", help="結果を書き出すJSONファイル")
+    parser.add_argument("--compare", help="比較するベースラインのJSONファイル")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["users"] != args.users:
+            parser.error(
+                f"ベースラインは {baseline['meta']['users']} 件で計測されています"
+            )
+
+    teardown = setup_django()
+    try:
+        import django
+        from django.test import override_settings
+
+        from accounts.seeding import deferred_indexes, seed_users
+
+        started = time.perf_counter()
+        with deferred_indexes():
+            seed_users(args.users)
+        print(f"seeded {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        ctx = Context(args.users)
+        results = {}
+        # リクエストごとのログ行は結果の表示の邪魔になるので出さない
+        with override_settings(REQUEST_METRICS_LOG=False):
+            for name, func, rounds in BENCHMARKS:
+                if args.only and args.only not in name:
+                    continue
+                benchmark = Benchmark(name, rounds)
+                func(benchmark, ctx)
+                results[name] = stats = benchmark.stats
+                print(format_stats(name, stats))
+    finally:
+        teardown()
+
+    if args.save:
+        meta = {
+            "users": args.users,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "machine": platform.machine(),
+        }
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+            f.write("\n")
+
+    if baseline:
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\nregressions (threshold {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 先頭に置き、セッション・認証のSQLも含めて計測する
+    "accounts.metrics.RequestMetricsMiddleware",
+    "accounts.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,10 +57,21 @@ ROOT_URLCONF = "mysite.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates と同じで、描画時間を計測する
+        "BACKEND": "accounts.metrics.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # テンプレートは初回だけ読み込んでパースし、以降はメモリ上のものを使う
+            # (DEBUG でも有効。runserver ではファイルの変更時に破棄される)
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -73,20 +87,97 @@ WSGI_APPLICATION = "mysite.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite の接続ごとに実行する PRAGMA
+# - journal_mode=WAL: 書き込み中も読み込みがブロックされない(DBファイルに保存される)
+# - synchronous=NORMAL: WAL ではコミットごとの fsync を省いても壊れない
+# - busy_timeout: ロック待ちの最大ミリ秒("database is locked" を出す前に待つ)
+# - cache_size: 負の値は KiB 単位(-65536 = 64MiB)
+# - mmap_size: 読み込みをメモリマップで行うバイト数
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -65536,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # 接続を使い回す(リクエストごとの接続・PRAGMA 実行をなくす)
+        "CONN_MAX_AGE": 600,
+        # 使い回す前に接続が生きているか確認する
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": ";".join(
+                f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+            ),
+            # transaction.atomic() の開始時に書き込みロックを取る
+            # (途中で読み込みから書き込みに昇格すると、busy_timeout を待たずに
+            #  "database is locked" になることがあるため)
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
 
+# 読み込み専用レプリカ(default の SQLite ファイルのコピー。sync_replicas コマンドで更新する)
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "NAME": BASE_DIR / "db.replica.sqlite3",
+    # テストでは default と同じDBを使う
+    "TEST": {"MIRROR": "default"},
+}
+
+DATABASE_ROUTERS = ["accounts.routers.PrimaryReplicaRouter"]
+
+# 一覧・詳細・CSVエクスポートの読み込みを振り分けるレプリカ(空なら全て default)
+# 例: DATABASE_REPLICAS = ["replica"]
+DATABASE_REPLICAS = []
+
+# 書き込んだユーザーの読み込みを default に固定する秒数(レプリカの遅れより長くする)
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # ユーザー一覧の行(1行が1件なので default の既定 300件では足りない)
+    "rows": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "rows",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    # 複数プロセスで共有したい場合はファイルキャッシュを使う
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+    },
+}
+
+# ユーザー詳細ページのキャッシュに使う CACHES のエイリアスと保存秒数
+USER_DETAIL_CACHE = "default"
+USER_DETAIL_CACHE_TIMEOUT = 600
+
+# ユーザー一覧の行のキャッシュに使う CACHES のエイリアス(None なら毎回描画)と保存秒数
+USER_ROW_CACHE = "rows"
+USER_ROW_CACHE_TIMEOUT = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
 AUTH_PASSWORD_VALIDATORS = [
     {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+        "NAME": (
+            "django.contrib.auth.password_validation."
+            "UserAttributeSimilarityValidator"
+        ),
     },
     {
         "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
@@ -100,6 +191,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# パスワードハッシュ(先頭が新規登録に使われる。残りは既存ハッシュの検証用)
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    "accounts.hashers.PBKDF2PasswordHasher",
+    "accounts.hashers.ScryptPasswordHasher",
+    "accounts.hashers.Argon2PasswordHasher",  # argon2-cffi が必要
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# ハッシャーごとのパラメータ(省略した項目は Django の標準値)
+PASSWORD_HASHER_PARAMS = {
+    "pbkdf2": {},
+    "scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 1},
+    "argon2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1},
+}
+
+# パスワードのハッシュ化に使うスレッド数と、待たせておける件数
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 32
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -129,3 +242,66 @@ TIME_ZONE = "Asia/Tokyo"
 USE_I18N = True
 
 LOGIN_REDIRECT_URL = "/"
+
+# ユーザー一覧の1ページあたりの件数
+USER_LIST_PAGE_SIZE = 50
+
+# JSON API の1ページの件数(limit= の既定値と上限)と、NDJSON で1回に読み込む件数
+USER_API_PAGE_SIZE = 100
+USER_API_MAX_PAGE_SIZE = 1000
+USER_API_STREAM_CHUNK_SIZE = 2000
+
+# CSVエクスポートで1回に読み込む行数
+CSV_EXPORT_CHUNK_SIZE = 2000
+# format=csv.gz の圧縮レベル(1〜9)
+CSV_EXPORT_GZIP_LEVEL = 6
+# format=parquet / arrow の行グループ(レコードバッチ)1つあたりの行数
+CSV_EXPORT_COLUMNAR_BATCH_SIZE = 65536
+
+# 差分エクスポート(export_users_csv?since=)で次回に回す直近の秒数
+# (コミット前の書き込みの updated_at がトークンより前になって取りこぼすのを防ぐ)
+USER_INCREMENTAL_EXPORT_LAG_SECONDS = 5
+
+# CSVインポートで1回に登録する行数
+CSV_IMPORT_BATCH_SIZE = 1000
+
+# ユーザー一括編集で1トランザクションにまとめる行数
+USER_BULK_EDIT_BATCH_SIZE = 500
+
+# CSVインポート・エクスポートのジョブを実行するスレッド数
+CSV_JOBS_MAX_WORKERS = 2
+# True にするとジョブをリクエスト内で実行する(テスト用)
+CSV_JOBS_EAGER = False
+
+# アップロード・生成ファイル(ジョブの入出力ファイルなど)の保存先
+MEDIA_ROOT = BASE_DIR / "media"
+
+# ユーザー一覧の件数(検索条件ごと)をキャッシュする秒数
+USER_COUNT_CACHE_TIMEOUT = 300
+
+# 論理削除から何日たったユーザーを archive_deleted_users でアーカイブするか
+USER_ARCHIVE_AFTER_DAYS = 365
+# archive_deleted_users で1回に移す件数
+USER_ARCHIVE_BATCH_SIZE = 1000
+
+# リクエストごとの計測(SQL件数・SQL時間・テンプレート描画時間・メモリ)
+REQUEST_METRICS_ENABLED = True
+# 計測値をレスポンスヘッダー(X-Query-Count, Server-Timing)に付ける
+REQUEST_METRICS_HEADERS = DEBUG
+# 計測値を accounts.metrics ロガーに JSON で出す
+REQUEST_METRICS_LOG = True
+# この時間(ミリ秒)以上かかったSQLを accounts.metrics.slow_query に出す(None で無効)
+REQUEST_METRICS_SLOW_QUERY_MS = None
+# True にすると tracemalloc でメモリのピークを測る(重いので調査時のみ)
+REQUEST_METRICS_TRACEMALLOC = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "accounts": {"handlers": ["console"], "level": "INFO"},
+    },
+}